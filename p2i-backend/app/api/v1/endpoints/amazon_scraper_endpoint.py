@@ -4,41 +4,57 @@ Exposes the Amazon scraper as an API endpoint within the main architecture
 """
 
 import logging
-import time
-from typing import Dict, Any, List
+import os
+from dataclasses import asdict
+from typing import Dict, Any, List, Optional
 from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, ConfigDict
 
 # Import the Amazon scraper service
-from app.services.amazon_scraper import AmazonScraper
+from app.services.amazon_scraper import AmazonScraper, ScrapeResult, get_amazon_scraper
+from app.core.concurrency import scrape_semaphore
 
 logger = logging.getLogger(__name__)
 
 # Create the Amazon scraper router
 router = APIRouter()
 
+# Router for the legacy /scraper/* paths, kept for backwards compatibility
+legacy_router = APIRouter()
+
 # Request/Response Models
 class AmazonScrapeRequest(BaseModel):
     """Request model for Amazon scraping endpoint - matches AmazonScraper format"""
     intent: str = "search"
     products: List[str]
-    filters: Dict[str, str] = {}
+    filters: Dict[str, Any] = {}
     attributes: List[str] = []
     max_products_per_query: int = 5
     
-    class Config:
-        schema_extra = {
-            "example": {
-                "intent": "search",
-                "products": ["laptops"],
-                "filters": {
-                    "price": "under ₹60000",
-                    "brand": "any"
-                },
-                "attributes": ["gaming"],
-                "max_products_per_query": 5
-            }
+    model_config = ConfigDict(json_schema_extra={
+        "example": {
+            "intent": "search",
+            "products": ["laptops"],
+            "filters": {
+                "price": "under ₹60000",
+                "brand": "any"
+            },
+            "attributes": ["gaming"],
+            "max_products_per_query": 5
         }
+    })
+
+# Legacy name for the request model used by /scraper/amazon
+ScraperRequest = AmazonScrapeRequest
+
+class ProductData(BaseModel):
+    """Model for individual product data."""
+    name: str
+    price: str
+    link: str
+    image: str
+    rating: str
 
 class AmazonScrapeResponse(BaseModel):
     """Response model for Amazon scraping endpoint"""
@@ -50,32 +66,80 @@ class AmazonScrapeResponse(BaseModel):
     products: List[Dict[str, Any]]
     metadata: Dict[str, Any]
     
-    class Config:
-        schema_extra = {
-            "example": {
-                "success": True,
-                "search_query": "laptops gaming",
-                "target_url": "https://www.amazon.in/s?k=laptops+gaming",
-                "products_found": 3,
-                "max_products_requested": 5,
-                "products": [
-                    {
-                        "name": "ASUS TUF Gaming F15 Laptop",
-                        "price": "₹55,990",
-                        "rating": "4.3 stars",
-                        "link": "https://www.amazon.in/...",
-                        "image": "https://m.media-amazon.com/..."
-                    }
-                ],
-                "metadata": {
-                    "scraper": "Amazon",
-                    "source": "amazon.in",
-                    "timestamp": "2025-08-04T00:00:00"
+    model_config = ConfigDict(json_schema_extra={
+        "example": {
+            "success": True,
+            "search_query": "laptops gaming",
+            "target_url": "https://www.amazon.in/s?k=laptops+gaming",
+            "products_found": 3,
+            "max_products_requested": 5,
+            "products": [
+                {
+                    "name": "ASUS TUF Gaming F15 Laptop",
+                    "price": "₹55,990",
+                    "rating": "4.3 stars",
+                    "link": "https://www.amazon.in/...",
+                    "image": "https://m.media-amazon.com/..."
                 }
+            ],
+            "metadata": {
+                "scraper": "Amazon",
+                "source": "amazon.in",
+                "timestamp": "2025-08-04T00:00:00"
             }
         }
+    })
+
+class ScraperResponse(AmazonScrapeResponse):
+    """Response model for the legacy /scraper/amazon endpoint."""
+    products: List[ProductData]
+    error: Optional[str] = None
+
+async def _scrape(request: AmazonScrapeRequest) -> ScrapeResult:
+    """
+    Run the shared Amazon scraper for a request, bounded by the scrape semaphore.
+    
+    Returns:
+        The ScrapeResult from AmazonScraper
+    """
+    # Convert the request to the exact format expected by the scraper
+    prompt_data = {
+        "intent": request.intent,
+        "products": request.products,
+        "filters": request.filters,
+        "attributes": request.attributes,
+        "max_products_per_query": request.max_products_per_query
+    }
+    
+    # Call the Amazon scraper with the proper format
+    async with scrape_semaphore:
+        return await get_amazon_scraper().scrape_products_async(prompt_data)
+
+def _response_content(result: ScrapeResult) -> Dict[str, Any]:
+    """
+    Build the AmazonScrapeResponse-shaped body for a scrape result.
+    
+    The scraper output already matches the response schema, so the endpoints
+    return this dict through ORJSONResponse instead of re-validating it with
+    Pydantic on every request.
+    """
+    return {
+        "success": result.success,
+        "search_query": result.search_query,
+        "target_url": result.target_url,
+        "products_found": result.products_found,
+        "max_products_requested": result.max_products_requested,
+        "products": result.products,
+        "metadata": result.metadata
+    }
 
-@router.post("/scrape_amazon", response_model=AmazonScrapeResponse)
+@router.on_event("shutdown")
+async def close_amazon_scraper():
+    """Close the shared scraper's HTTP session on shutdown."""
+    if get_amazon_scraper.cache_info().currsize:
+        await get_amazon_scraper().aclose()
+
+@router.post("/scrape_amazon", response_model=None, responses={200: {"model": AmazonScrapeResponse}})
 async def scrape_amazon_products(request: AmazonScrapeRequest):
     """
     Scrape Amazon products based on structured prompt data
@@ -90,44 +154,23 @@ async def scrape_amazon_products(request: AmazonScrapeRequest):
         AmazonScrapeResponse with scraped product data
     """
     try:
-        logger.info(f"Amazon scraping request: {request.products} with filters: {request.filters}")
-        
-        # Initialize the Amazon scraper
-        scraper = AmazonScraper()
-        
-        # Convert the request to the exact format expected by the scraper
-        prompt_data = {
-            "intent": request.intent,
-            "products": request.products,
-            "filters": request.filters,
-            "attributes": request.attributes,
-            "max_products_per_query": request.max_products_per_query
-        }
+        logger.info("Amazon scraping request: %s with filters: %s", request.products, request.filters)
         
-        # Call the Amazon scraper with the proper format
-        scrape_result = scraper.scrape_products(prompt_data)
+        scrape_result = await _scrape(request)
         
         # Check if scraping was successful
-        if not scrape_result.get("success", False):
-            error_msg = scrape_result.get("error", "Unknown scraping error")
-            logger.error(f"Amazon scraping failed: {error_msg}")
+        if not scrape_result.success:
+            error_msg = scrape_result.error or "Unknown scraping error"
+            logger.error("Amazon scraping failed: %s", error_msg)
             raise HTTPException(
                 status_code=500,
                 detail=f"Amazon scraping failed: {error_msg}"
             )
         
-        logger.info(f"Amazon scraping completed: {scrape_result.get('products_found', 0)} products found")
+        logger.info("Amazon scraping completed: %s products found", scrape_result.products_found)
         
         # Return the result in the same format as the scraper provides
-        return AmazonScrapeResponse(
-            success=scrape_result.get("success", False),
-            search_query=scrape_result.get("search_query", ""),
-            target_url=scrape_result.get("target_url", ""),
-            products_found=scrape_result.get("products_found", 0),
-            max_products_requested=scrape_result.get("max_products_requested", request.max_products_per_query),
-            products=scrape_result.get("products", []),
-            metadata=scrape_result.get("metadata", {})
-        )
+        return ORJSONResponse(content=_response_content(scrape_result))
         
     except HTTPException:
         # Re-raise HTTP exceptions as-is
@@ -150,23 +193,109 @@ async def amazon_scraper_health():
         Health status and service information
     """
     try:
-        # Test if we can initialize the scraper
-        scraper = AmazonScraper()
+        # Check the configuration directly instead of building a scraper per probe
+        if not os.getenv("SCRAPEDO_API_KEY"):
+            raise ValueError("SCRAPEDO_API_KEY not found in environment variables")
         
         return {
             "status": "healthy",
             "service": "amazon_scraper",
             "version": "1.0.0",
-            "token_configured": bool(scraper.token),
-            "max_products_limit": scraper.max_products,
+            "token_configured": True,
+            "max_products_limit": AmazonScraper.max_products,
             "endpoints": {
                 "/scrape_amazon": "Main Amazon scraping endpoint",
                 "/amazon/health": "Health check endpoint"
             }
         }
     except Exception as e:
-        logger.error(f"Amazon scraper health check failed: {e}")
+        logger.error("Amazon scraper health check failed: %s", e)
         raise HTTPException(
             status_code=503,
             detail=f"Amazon scraper service unavailable: {str(e)}"
         )
+
+@legacy_router.post("/amazon", response_model=None, responses={200: {"model": ScraperResponse}})
+async def scrape_amazon_products_legacy(request: ScraperRequest):
+    """
+    Scrape Amazon products based on parsed prompt JSON (legacy /scraper/amazon path).
+    
+    Unlike /scrape_amazon, scraping failures are reported in the response body
+    with success=False instead of as an HTTP error.
+    
+    Example request:
+    {
+        "intent": "search",
+        "products": ["laptops"],
+        "filters": {
+            "price": "under ₹50000",
+            "brand": "any"
+        },
+        "attributes": ["gaming", "intel"],
+        "max_products_per_query": 5
+    }
+    """
+    try:
+        logger.debug("🔍 Received scraper request:")
+        logger.debug("   Intent: %s", request.intent)
+        logger.debug("   Products: %s", request.products)
+        logger.debug("   Filters: %s", request.filters)
+        logger.debug("   Attributes: %s", request.attributes)
+        logger.debug("   Max products: %s", request.max_products_per_query)
+        
+        result = await _scrape(request)
+        
+        if result.success:
+            content = _response_content(result)
+            content["error"] = None
+        else:
+            content = {
+                "success": False,
+                "search_query": result.search_query,
+                "target_url": result.target_url,
+                "products_found": 0,
+                "max_products_requested": request.max_products_per_query,
+                "products": [],
+                "metadata": {},
+                "error": result.error or "Unknown error"
+            }
+        
+        return ORJSONResponse(content=content)
+            
+    except Exception as e:
+        logger.error("❌ Error in scraper endpoint: %s", e)
+        raise HTTPException(
+            status_code=500, 
+            detail=f"Scraper processing failed: {str(e)}"
+        )
+
+@legacy_router.get("/test")
+async def test_scraper():
+    """
+    Test endpoint to verify scraper functionality.
+    """
+    try:
+        # Test with sample data
+        test_request = AmazonScrapeRequest(
+            intent="search",
+            products=["laptops"],
+            filters={
+                "price": "under ₹50000",
+                "brand": "any"
+            },
+            attributes=["gaming", "intel"],
+            max_products_per_query=3
+        )
+        
+        result = await _scrape(test_request)
+        
+        return {
+            "message": "Scraper test completed",
+            "result": asdict(result)
+        }
+        
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Test failed: {str(e)}"
+        )
@@ -8,55 +8,20 @@ import logging
 import time
 from typing import Dict, Any, List, Optional
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
 
-# Set up logger first
-logger = logging.getLogger(__name__)
-
 # Import our Phase 7 AI modules
-import sys
-from pathlib import Path
-
-# Add paths for imports - fix the relative paths
-backend_root = Path(__file__).parent.parent.parent.parent
-core_dir = backend_root / "app" / "core"
-scraper_dir = backend_root / "app" / "scrapers" / "flipkart"
+from app.core.router_agent import route_query
+from app.core.product_discoverer import find_products_with_ai
+from app.core.rag_pipeline import run_rag_query
+from app.core.amazon_prompt_parser import parse_query_for_amazon_async
+from app.core.chart_generator import generate_price_chart_image, generate_specs_chart_image
+from app.core.product_table import build_product_table
+from app.core.concurrency import rag_semaphore
+from app.scrapers.flipkart.google_search import google_search
 
-# Add paths to Python path
-sys.path.insert(0, str(core_dir))
-sys.path.insert(0, str(scraper_dir))
-
-# Import modules
-try:
-    from app.core.router_agent import route_query
-    from app.core.product_discoverer import find_products_with_ai
-    from app.core.rag_pipeline import run_rag_query
-    from app.core.amazon_prompt_parser import parse_query_for_amazon
-    from app.core.chart_generator import generate_price_chart_image, generate_specs_chart_image
-    from app.scrapers.flipkart.google_search import google_search
-    logger.info("✅ All Phase 8 modules imported successfully")
-except ImportError as e:
-    logger.error(f"❌ Import error in query handler: {e}")
-    # Create fallback functions to prevent server crash
-    def route_query(query):
-        return {"intent": "discovery_query", "query": query}
-    def find_products_with_ai(query):
-        return []
-    def run_rag_query(query, persona=None):
-        return "Service temporarily unavailable"
-    def parse_query_for_amazon(query):
-        return {
-            "intent": "search",
-            "products": [query],
-            "filters": {"price": "any", "brand": "any"},
-            "attributes": [],
-            "max_products_per_query": 5
-        }
-    
-    class GoogleSearchFallback:
-        def search_products(self, query, num_results=5):
-            return []
-    google_search = GoogleSearchFallback()
+logger = logging.getLogger(__name__)
 
 # Request/Response Models
 class QueryRequest(BaseModel):
@@ -66,7 +31,7 @@ class QueryRequest(BaseModel):
     max_results: int = 5
 
 class DiscoveryResult(BaseModel):
-    """Response model for discovery queries."""
+    """Response model for discovery queries (the body built by _discovery_response)."""
     type: str = "discovery_result"
     query: str
     products: List[Dict[str, Any]]
@@ -92,6 +57,173 @@ class AnalysisResult(BaseModel):
 # Create router
 router = APIRouter()
 
+# Seconds a successful /readiness result is reused before re-running the router agent
+READINESS_CACHE_TTL = 60
+_readiness_cache = None  # (timestamp, response) of the last successful readiness check
+
+async def _gather_discovery_sources(extracted_query: str, request: QueryRequest):
+    """
+    Run the AI Product Discoverer, Google Search and Amazon parser concurrently.
+    
+    Each source fails independently: a failed discoverer or search yields an
+    empty list and a failed Amazon parse yields None, so one slow or broken
+    upstream does not discard the results of the others.
+    
+    Returns:
+        Tuple of (ai_products, google_results, amazon_query_data)
+    """
+    ai_products, google_results, amazon_query_data = await asyncio.gather(
+        asyncio.to_thread(find_products_with_ai, extracted_query),
+        asyncio.to_thread(google_search.search_products, extracted_query, request.max_results),
+        parse_query_for_amazon_async(request.query),
+        return_exceptions=True,
+    )
+    
+    if isinstance(ai_products, Exception):
+        logger.error(f"AI Product Discoverer failed: {ai_products}")
+        ai_products = []
+    if isinstance(google_results, Exception):
+        logger.error(f"Google Search failed: {google_results}")
+        google_results = []
+    if isinstance(amazon_query_data, Exception):
+        logger.error(f"Amazon query parsing failed: {amazon_query_data}")
+        amazon_query_data = None
+    
+    return ai_products, google_results, amazon_query_data
+
+def _discovery_response(request: QueryRequest, execution_time: float, products: List[Dict[str, Any]],
+                        links: List[Dict[str, Any]], amazon_query_data: Optional[Dict[str, Any]],
+                        price_chart_image: Optional[str] = None,
+                        specs_chart_image: Optional[str] = None) -> ORJSONResponse:
+    """
+    Serialize a DiscoveryResult-shaped body with orjson.
+    
+    Products come from the discoverer as plain dicts, so they are written out
+    directly instead of being copied and re-validated through the Pydantic model.
+    """
+    return ORJSONResponse(content={
+        "type": "discovery_result",
+        "query": request.query,
+        "products": products,
+        "links": links,
+        "execution_time": execution_time,
+        "sources": ["ai_discoverer", "google_search"],
+        "amazon_ready": bool(amazon_query_data),
+        "amazon_query_data": amazon_query_data,
+        "price_chart_image": price_chart_image,
+        "specs_chart_image": specs_chart_image
+    })
+
+async def _handle_discovery(request: QueryRequest, extracted_query: str, start_time: float) -> ORJSONResponse:
+    """
+    Discovery Workflow: AI Product Discoverer + Google Search (parallel).
+    
+    Args:
+        request: The original query request
+        extracted_query: Product query extracted by the router agent
+        start_time: Request start time used for execution_time
+        
+    Returns:
+        DiscoveryResult-shaped ORJSONResponse with products, links, Amazon query data and charts
+    """
+    logger.info("🔍 Executing Discovery Workflow...")
+    
+    try:
+        # Run AI discovery, Google search and Amazon parsing concurrently
+        logger.info("🤖 Calling AI Product Discoverer, Google Search API and Amazon parser...")
+        ai_products, google_results, amazon_query_data = await _gather_discovery_sources(
+            extracted_query, request
+        )
+        
+        # NEW: Generate chart images server-side
+        logger.info("📊 Generating chart images...")
+        product_table = build_product_table(ai_products)
+        price_chart = await asyncio.to_thread(generate_price_chart_image, product_table)
+        specs_chart = await asyncio.to_thread(generate_specs_chart_image, product_table)
+        
+        execution_time = time.time() - start_time
+        
+        logger.info(f"✅ Discovery completed: {len(ai_products)} AI products, {len(google_results)} Google results")
+        
+        return _discovery_response(
+            request, execution_time,
+            products=ai_products,
+            links=google_results,
+            amazon_query_data=amazon_query_data,
+            price_chart_image=price_chart,
+            specs_chart_image=specs_chart
+        )
+        
+    except Exception as e:
+        logger.error(f"Error in discovery workflow: {e}")
+        execution_time = time.time() - start_time
+        
+        # Still try to provide Amazon data even if other parts fail
+        try:
+            amazon_query_data = await parse_query_for_amazon_async(request.query)
+        except Exception:
+            amazon_query_data = None
+        
+        return _discovery_response(
+            request, execution_time,
+            products=[],
+            links=[],
+            amazon_query_data=amazon_query_data
+        )
+
+async def _handle_analytical(request: QueryRequest, extracted_query: str, start_time: float) -> AnalysisResult:
+    """
+    Analysis Workflow: RAG Analyzer with optional persona.
+    
+    Args:
+        request: The original query request
+        extracted_query: Product name extracted by the router agent
+        start_time: Request start time used for execution_time
+        
+    Returns:
+        AnalysisResult with the RAG answer
+    """
+    logger.info("🧠 Executing Analysis Workflow...")
+    
+    try:
+        # Call RAG pipeline with optional persona
+        async with rag_semaphore:
+            rag_result = await asyncio.to_thread(
+                run_rag_query,
+                product_name=extracted_query,
+                question=request.query,
+                persona=request.persona
+            )
+        
+        execution_time = time.time() - start_time
+        
+        logger.info(f"✅ Analysis completed in {execution_time:.2f}s")
+        
+        return AnalysisResult(
+            query=request.query,
+            answer=rag_result["answer"],
+            persona=request.persona,
+            execution_time=execution_time,
+            source="rag_analyzer"
+        )
+        
+    except Exception as e:
+        logger.error(f"Error in analysis workflow: {e}")
+        execution_time = time.time() - start_time
+        return AnalysisResult(
+            query=request.query,
+            answer=f"I apologize, but I encountered an error while analyzing '{request.query}'. Please try rephrasing your question.",
+            persona=request.persona,
+            execution_time=execution_time,
+            source="rag_analyzer"
+        )
+
+# Intent -> workflow handler; unknown intents fall back to discovery
+INTENT_HANDLERS = {
+    "discovery_query": _handle_discovery,
+    "analytical_query": _handle_analytical,
+}
+
 @router.post("/handle_query")
 async def handle_query(request: QueryRequest):
     """
@@ -111,150 +243,20 @@ async def handle_query(request: QueryRequest):
     try:
         # Step 1: Route the query using Master Router Agent
         logger.info("🧠 Routing query through Master Router Agent...")
-        routing_result = route_query(request.query)
+        routing_result = await asyncio.to_thread(route_query, request.query)
         
         intent = routing_result.get("intent")
         extracted_query = routing_result.get("query")
         
         logger.info(f"📍 Router decision: {intent} | Extracted: {extracted_query}")
         
-        if intent == "discovery_query":
-            # Discovery Workflow: AI Product Discoverer + Google Search (parallel)
-            logger.info("🔍 Executing Discovery Workflow...")
-            
-            try:
-                # Run both tools - they are synchronous functions
-                logger.info("🤖 Calling AI Product Discoverer...")
-                ai_products = find_products_with_ai(extracted_query)
-                
-                logger.info("🌐 Calling Google Search API...")
-                google_results = google_search.search_products(extracted_query, request.max_results)
-                
-                # NEW: Parse query for Amazon scraper integration
-                logger.info("🛒 Preparing Amazon query data...")
-                amazon_query_data = parse_query_for_amazon(request.query)
-                
-                # NEW: Generate chart images server-side
-                logger.info("📊 Generating chart images...")
-                price_chart = generate_price_chart_image(ai_products)
-                specs_chart = generate_specs_chart_image(ai_products)
-                
-                execution_time = time.time() - start_time
-                
-                logger.info(f"✅ Discovery completed: {len(ai_products)} AI products, {len(google_results)} Google results")
-                
-                return DiscoveryResult(
-                    query=request.query,
-                    products=ai_products,
-                    links=google_results,
-                    execution_time=execution_time,
-                    sources=["ai_discoverer", "google_search"],
-                    amazon_ready=True,
-                    amazon_query_data=amazon_query_data,
-                    price_chart_image=price_chart,
-                    specs_chart_image=specs_chart
-                )
-                
-            except Exception as e:
-                logger.error(f"Error in discovery workflow: {e}")
-                execution_time = time.time() - start_time
-                
-                # Still try to provide Amazon data even if other parts fail
-                try:
-                    amazon_query_data = parse_query_for_amazon(request.query)
-                except:
-                    amazon_query_data = None
-                
-                return DiscoveryResult(
-                    query=request.query,
-                    products=[],
-                    links=[],
-                    execution_time=execution_time,
-                    sources=["ai_discoverer", "google_search"],
-                    amazon_ready=bool(amazon_query_data),
-                    amazon_query_data=amazon_query_data,
-                    price_chart_image=None,
-                    specs_chart_image=None
-                )
-            
-        elif intent == "analytical_query":
-            # Analysis Workflow: RAG Analyzer
-            logger.info("🧠 Executing Analysis Workflow...")
-            
-            try:
-                # Call RAG pipeline with optional persona
-                rag_result = run_rag_query(
-                    query=extracted_query,
-                    persona=request.persona
-                )
-                
-                execution_time = time.time() - start_time
-                
-                logger.info(f"✅ Analysis completed in {execution_time:.2f}s")
-                
-                return AnalysisResult(
-                    query=request.query,
-                    answer=rag_result,
-                    persona=request.persona,
-                    execution_time=execution_time,
-                    source="rag_analyzer"
-                )
-                
-            except Exception as e:
-                logger.error(f"Error in analysis workflow: {e}")
-                execution_time = time.time() - start_time
-                return AnalysisResult(
-                    query=request.query,
-                    answer=f"I apologize, but I encountered an error while analyzing '{request.query}'. Please try rephrasing your question.",
-                    persona=request.persona,
-                    execution_time=execution_time,
-                    source="rag_analyzer"
-                )
-        
-        else:
+        handler = INTENT_HANDLERS.get(intent)
+        if handler is None:
             # Fallback to discovery if intent is unclear
             logger.warning(f"Unknown intent '{intent}', defaulting to discovery workflow")
-            
-            try:
-                # Default to discovery workflow
-                ai_products = find_products_with_ai(extracted_query)
-                google_results = google_search.search_products(extracted_query, request.max_results)
-                
-                # Prepare Amazon data for fallback too
-                amazon_query_data = parse_query_for_amazon(request.query)
-                
-                # Generate chart images for fallback too
-                price_chart = generate_price_chart_image(ai_products)
-                specs_chart = generate_specs_chart_image(ai_products)
-                
-                execution_time = time.time() - start_time
-                
-                return DiscoveryResult(
-                    query=request.query,
-                    products=ai_products,
-                    links=google_results,
-                    execution_time=execution_time,
-                    sources=["ai_discoverer", "google_search"],
-                    amazon_ready=True,
-                    amazon_query_data=amazon_query_data,
-                    price_chart_image=price_chart,
-                    specs_chart_image=specs_chart
-                )
-                
-            except Exception as e:
-                logger.error(f"Error in fallback discovery workflow: {e}")
-                execution_time = time.time() - start_time
-                return DiscoveryResult(
-                    query=request.query,
-                    products=[],
-                    links=[],
-                    execution_time=execution_time,
-                    sources=["ai_discoverer", "google_search"],
-                    amazon_ready=False,
-                    amazon_query_data=None,
-                    price_chart_image=None,
-                    specs_chart_image=None
-                )
+            handler = _handle_discovery
+        
+        return await handler(request, extracted_query, start_time)
             
     except Exception as e:
         execution_time = time.time() - start_time
@@ -273,13 +275,31 @@ async def handle_query(request: QueryRequest):
 @router.get("/health")
 async def health_check():
     """
-    Health check endpoint for the central query handler.
+    Liveness check for the central query handler.
+    
+    Constant-time so load balancer probes never call the router agent;
+    use /readiness for a check that exercises it.
+    """
+    return {"status": "ok"}
+
+@router.get("/readiness")
+async def readiness_check():
+    """
+    Readiness check for the central query handler.
+    
+    Runs a test query through the router agent. The result is cached for
+    READINESS_CACHE_TTL seconds so bursts of probes only hit the LLM once.
     """
+    global _readiness_cache
+    
+    if _readiness_cache and time.monotonic() - _readiness_cache[0] < READINESS_CACHE_TTL:
+        return _readiness_cache[1]
+    
     try:
         # Test basic imports and connections
-        test_routing = route_query("test query")
+        test_routing = await asyncio.to_thread(route_query, "test query")
         
-        return {
+        result = {
             "status": "healthy",
             "message": "Central Query Handler is operational",
             "components": {
@@ -290,6 +310,8 @@ async def health_check():
             },
             "test_routing": test_routing
         }
+        _readiness_cache = (time.monotonic(), result)
+        return result
         
     except Exception as e:
         raise HTTPException(
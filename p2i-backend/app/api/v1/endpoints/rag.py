@@ -1,8 +1,18 @@
+import asyncio
+import logging
+import time
+import orjson
+import re
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import iterate_in_threadpool
 from pydantic import BaseModel
-from app.core.rag_pipeline import run_rag_query
-from app.services.vector_store import VectorStoreService
-from typing import List, Dict, Any, Optional
+from app.core.rag_pipeline import run_rag_query, run_rag_query_stream, forget_collection, warm_up_retrievers
+from app.services.vector_store import get_vector_service
+from app.core.concurrency import rag_semaphore
+from typing import List, Dict, Any, Optional, Tuple
+
+logger = logging.getLogger(__name__)
 
 # Pydantic model for the request body
 class RAGQuery(BaseModel):
@@ -30,23 +40,52 @@ class CollectionDetail(BaseModel):
 # Create a new router
 router = APIRouter()
 
+# Short-lived cache for the collection listing: (created_at, [CollectionInfo, ...])
+COLLECTIONS_CACHE_TTL = 30
+_collections_cache = None
+
+# Matches the '[Relevance: ...]' prefix written by the scraper; group 1 keeps the label
+_RELEVANCE_RE = re.compile(r'^\[(Relevance:[^\]]*)\](.*)', re.DOTALL)
+
+# Number of documents fetched per ChromaDB round-trip when streaming a collection
+COLLECTION_STREAM_BATCH = 100
+
+@router.on_event("startup")
+async def warm_vector_service():
+    """
+    Create the shared vector store service and open retrievers for existing
+    collections at startup so the first request doesn't pay for them.
+    """
+    try:
+        await asyncio.to_thread(get_vector_service)
+        opened = await asyncio.to_thread(warm_up_retrievers)
+        logger.info("Opened retrievers for %s collections", opened)
+    except Exception as e:
+        logger.warning("Vector store service not initialized at startup: %s", e)
+
 @router.post("/ask")
-async def ask_product_question(query: RAGQuery):
+async def ask_product_question(query: RAGQuery, refresh: bool = False):
     """
     Accepts a product name, a question, and optional persona, 
     and returns an AI-generated answer based on scraped web context.
+    
+    The pipeline caches answers per (product, persona) and question; pass
+    ?refresh=true to bypass the cache and recompute the answer.
     """
-    print(f"Received query for product: '{query.product_name}'")
-    print(f"Question: '{query.question}'")
-    print(f"Persona: '{query.persona}'")
+    logger.debug("Received query for product: '%s'", query.product_name)
+    logger.debug("Question: '%s'", query.question)
+    logger.debug("Persona: '%s'", query.persona)
     
     try:
         # Call the RAG pipeline function with persona
-        result = run_rag_query(
-            product_name=query.product_name,
-            question=query.question,
-            persona=query.persona  # Pass persona to pipeline
-        )
+        async with rag_semaphore:
+            result = await asyncio.to_thread(
+                run_rag_query,
+                product_name=query.product_name,
+                question=query.question,
+                persona=query.persona,  # Pass persona to pipeline
+                use_cache=not refresh
+            )
         
         # Return enhanced response with persona information
         return {
@@ -57,48 +96,109 @@ async def ask_product_question(query: RAGQuery):
             "answer": result["answer"],
             "sources": result.get("sources", []),
             "execution_time": result.get("execution_time", 0),
-            "persona_used": result.get("persona_used", "general")
+            "persona_used": result.get("persona_used", "general"),
+            "cached": result.get("cached", False)
         }
         
     except Exception as e:
-        print(f"Error in RAG query: {str(e)}")
+        logger.error("Error in RAG query: %s", e)
         raise HTTPException(status_code=500, detail=f"RAG processing failed: {str(e)}")
 
+@router.post("/ask/stream")
+async def ask_product_question_stream(query: RAGQuery, refresh: bool = False):
+    """
+    Streaming version of /ask: returns NDJSON events as the answer is generated.
+    
+    Each line is {"event": "token", "text": ...} for a chunk of the answer, and the
+    last line is {"event": "done", ...} with the final answer, sources,
+    execution_time and persona_used, as returned by /ask.
+    """
+    logger.debug("Received streaming query for product: '%s'", query.product_name)
+    
+    events = run_rag_query_stream(
+        product_name=query.product_name,
+        question=query.question,
+        persona=query.persona,
+        use_cache=not refresh
+    )
+    
+    async def _generate():
+        # Hold the RAG slot for the whole stream; scraping and generation run in worker threads
+        async with rag_semaphore:
+            try:
+                async for event in iterate_in_threadpool(events):
+                    yield orjson.dumps(event) + b"\n"
+            except Exception as e:
+                logger.error("Error in streaming RAG query: %s", e)
+                yield orjson.dumps({"event": "error", "detail": f"RAG processing failed: {str(e)}"}) + b"\n"
+    
+    return StreamingResponse(_generate(), media_type="application/x-ndjson")
+
+def _split_relevance(doc: str) -> Tuple[Optional[str], str]:
+    """
+    Split a stored document into its '[Relevance: ...]' prefix (if any) and its content.
+    """
+    match = _RELEVANCE_RE.match(doc)
+    if match:
+        return match.group(1), match.group(2).strip()
+    return None, doc
+
+def _summarize_collection(collection) -> CollectionInfo:
+    """
+    Build the CollectionInfo summary (sample documents + count) for one collection.
+    """
+    try:
+        # Get sample documents
+        result = collection.get(limit=3)
+        sample_docs = []
+        if result['documents']:
+            for doc in result['documents'][:2]:
+                # Extract relevance score if present
+                preview = doc[:150] + "..." if len(doc) > 150 else doc
+                sample_docs.append(preview)
+        
+        return CollectionInfo(
+            name=collection.name,
+            document_count=collection.count(),
+            sample_documents=sample_docs
+        )
+    except Exception as e:
+        return CollectionInfo(
+            name=collection.name,
+            document_count=0,
+            sample_documents=[f"Error getting documents: {str(e)}"]
+        )
+
+def _invalidate_collections_cache():
+    """
+    Drop the cached collection listing so the next request rebuilds it.
+    """
+    global _collections_cache
+    _collections_cache = None
+
 @router.get("/chromadb/collections", response_model=List[CollectionInfo])
 async def get_chromadb_collections():
     """
     Get all ChromaDB collections with basic information.
+    
+    Collections are summarized concurrently and the listing is cached for
+    COLLECTIONS_CACHE_TTL seconds, since it rarely changes between requests.
     """
+    global _collections_cache
+    
+    if _collections_cache and time.monotonic() - _collections_cache[0] < COLLECTIONS_CACHE_TTL:
+        return _collections_cache[1]
+    
     try:
-        vector_service = VectorStoreService()
+        vector_service = get_vector_service()
         client = vector_service.client
         
-        collections = client.list_collections()
-        collection_info = []
-        
-        for collection in collections:
-            try:
-                # Get sample documents
-                result = collection.get(limit=3)
-                sample_docs = []
-                if result['documents']:
-                    for doc in result['documents'][:2]:
-                        # Extract relevance score if present
-                        preview = doc[:150] + "..." if len(doc) > 150 else doc
-                        sample_docs.append(preview)
-                
-                collection_info.append(CollectionInfo(
-                    name=collection.name,
-                    document_count=collection.count(),
-                    sample_documents=sample_docs
-                ))
-            except Exception as e:
-                collection_info.append(CollectionInfo(
-                    name=collection.name,
-                    document_count=0,
-                    sample_documents=[f"Error getting documents: {str(e)}"]
-                ))
+        collections = await asyncio.to_thread(client.list_collections)
+        collection_info = list(await asyncio.gather(
+            *[asyncio.to_thread(_summarize_collection, collection) for collection in collections]
+        ))
         
+        _collections_cache = (time.monotonic(), collection_info)
         return collection_info
     
     except Exception as e:
@@ -110,7 +210,7 @@ async def get_collection_details(collection_name: str, limit: int = 10):
     Get detailed information about a specific ChromaDB collection.
     """
     try:
-        vector_service = VectorStoreService()
+        vector_service = get_vector_service()
         client = vector_service.client
         
         try:
@@ -128,13 +228,7 @@ async def get_collection_details(collection_name: str, limit: int = 10):
                 metadata = result['metadatas'][i] if result['metadatas'] and i < len(result['metadatas']) else None
                 
                 # Extract relevance score from document content if present
-                relevance_score = None
-                content = doc
-                if doc.startswith('[Relevance:'):
-                    end_bracket = doc.find(']')
-                    if end_bracket != -1:
-                        relevance_score = doc[1:end_bracket]
-                        content = doc[end_bracket + 1:].strip()
+                relevance_score, content = _split_relevance(doc)
                 
                 documents.append(DocumentDetail(
                     id=doc_id,
@@ -154,17 +248,66 @@ async def get_collection_details(collection_name: str, limit: int = 10):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error accessing collection: {str(e)}")
 
+@router.get("/chromadb/collections/{collection_name}/stream")
+async def stream_collection_documents(collection_name: str, limit: int = 1000):
+    """
+    Stream documents from a ChromaDB collection as NDJSON (one JSON object per line).
+    
+    Documents are fetched from ChromaDB in batches of COLLECTION_STREAM_BATCH and
+    written out as they are parsed, so large dumps don't have to be held in memory.
+    Use the plain collection details endpoint for small limits.
+    """
+    try:
+        vector_service = get_vector_service()
+        client = vector_service.client
+        
+        try:
+            collection = await asyncio.to_thread(client.get_collection, name=collection_name)
+        except Exception:
+            raise HTTPException(status_code=404, detail=f"Collection '{collection_name}' not found")
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error accessing collection: {str(e)}")
+    
+    async def _generate():
+        offset = 0
+        while offset < limit:
+            batch_size = min(COLLECTION_STREAM_BATCH, limit - offset)
+            result = await asyncio.to_thread(collection.get, limit=batch_size, offset=offset)
+            docs = result['documents'] or []
+            ids = result['ids'] or []
+            metadatas = result['metadatas'] or []
+            
+            for i, doc in enumerate(docs):
+                relevance_score, content = _split_relevance(doc)
+                yield orjson.dumps({
+                    "id": ids[i] if i < len(ids) else f"doc_{offset + i}",
+                    "content": content,
+                    "metadata": metadatas[i] if i < len(metadatas) else None,
+                    "relevance_score": relevance_score
+                }) + b"\n"
+            
+            if len(docs) < batch_size:
+                break
+            offset += len(docs)
+    
+    return StreamingResponse(_generate(), media_type="application/x-ndjson")
+
 @router.delete("/chromadb/collections/{collection_name}")
 async def delete_collection(collection_name: str):
     """
     Delete a specific ChromaDB collection.
     """
     try:
-        vector_service = VectorStoreService()
+        vector_service = get_vector_service()
         client = vector_service.client
         
         try:
             client.delete_collection(name=collection_name)
+            _invalidate_collections_cache()
+            forget_collection(collection_name)
             return {"message": f"Collection '{collection_name}' deleted successfully"}
         except Exception:
             raise HTTPException(status_code=404, detail=f"Collection '{collection_name}' not found")
@@ -180,7 +323,7 @@ async def search_collection(collection_name: str, query: str, limit: int = 5):
     Search for similar documents in a specific collection.
     """
     try:
-        vector_service = VectorStoreService()
+        vector_service = get_vector_service()
         
         # Get retriever for the collection
         retriever = vector_service.get_retriever(collection_name)
@@ -192,14 +335,9 @@ async def search_collection(collection_name: str, query: str, limit: int = 5):
         results = []
         for i, doc in enumerate(docs):
             content = doc.page_content
-            relevance_score = None
             
             # Extract relevance score if present
-            if content.startswith('[Relevance:'):
-                end_bracket = content.find(']')
-                if end_bracket != -1:
-                    relevance_score = content[1:end_bracket]
-                    content = content[end_bracket + 1:].strip()
+            relevance_score, content = _split_relevance(content)
             
             results.append({
                 "rank": i + 1,
@@ -3,25 +3,140 @@ Amazon Prompt Parser for Prompt2Insight
 Extracts structured data from user queries to feed into Amazon scraper
 """
 
+import asyncio
 import os
-import json
+import copy
+import hashlib
+import orjson
 import re
 import logging
-from typing import Dict, List, Any
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Tuple
+import numpy as np
 import google.generativeai as genai
 
+from app.core.llm_cache import query_signature
+
 logger = logging.getLogger(__name__)
 
+# Parse cache settings: max cached queries and the cosine similarity above
+# which a previously parsed query is reused for a new one
+PARSE_CACHE_SIZE = 1000
+SEMANTIC_MATCH_THRESHOLD = 0.92
+EMBEDDING_MODEL = "models/text-embedding-004"
+
+# On-disk parse cache so parses survive restarts; set the path to "" to disable.
+# Defaults to cache_store/ in the backend directory, next to chroma_db_store/
+PARSE_CACHE_PATH = os.getenv(
+    "P2I_PARSE_CACHE_PATH",
+    str(Path(__file__).parent.parent.parent / "cache_store" / "parse_cache.sqlite3")
+)
+PARSE_CACHE_TTL = 7 * 24 * 3600  # seconds
+
+# Product keyword -> search category used by the fallback parse
+_PRODUCT_CATEGORIES = {
+    "laptop": "laptops",
+    "phone": "phones",
+    "mobile": "phones",
+    "headphone": "headphones",
+    "earphone": "headphones",
+    "tablet": "tablets"
+}
+_COMMON_BRANDS = ("hp", "dell", "lenovo", "asus", "acer", "apple", "samsung", "oneplus", "xiaomi", "realme")
+_COMMON_ATTRIBUTES = ("gaming", "office", "student", "professional", "lightweight", "premium", "budget")
+_PRICE_PREFIXES = ("under", "below", "less than", "budget")
+
+def _alternation(keywords) -> str:
+    """Join keywords into a regex alternation, longest first so no keyword shadows a longer one"""
+    return "|".join(map(re.escape, sorted(keywords, key=len, reverse=True)))
+
+# Fallback parse patterns, compiled once at import
+# One alternation with a named group per field, so a query is scanned once.
+# Price comes before attribute so "budget 50000" is read as a price. The amount must
+# end the number, so "50k" and "50,000" are not read as ₹50. Products have no word
+# boundary so "smartphone" still parses as a phone; "headphone" wins as the earlier match.
+_FALLBACK_RE = re.compile(
+    rf"(?P<product>{_alternation(_PRODUCT_CATEGORIES)})"
+    rf"|(?P<price>(?:{_alternation(_PRICE_PREFIXES)})\s*₹?(?P<amount>\d+)\b(?!,\d))"
+    rf"|(?P<brand>\b(?:{_alternation(_COMMON_BRANDS)})\b)"
+    rf"|(?P<attribute>\b(?:{_alternation(_COMMON_ATTRIBUTES)}))"
+)
+_TOKEN_RE = re.compile(r"[^\W_]+")
+# Shorthand and comma-grouped amounts ("50k", "1.5 lakh", "50,000") need the LLM to read
+_COMPOUND_AMOUNT_RE = re.compile(r"\d(?:[\d,.]*\d)?\s*(?:k|lakhs?|lacs?)\b|\d,\d")
+
+# genai.configure sets process-wide state, so parser construction is serialized
+_GENAI_INIT_LOCK = threading.Lock()
+
+# Share of query tokens the regexes must explain before the LLM is skipped
+FAST_PATH_MIN_COVERAGE = 0.8
+
+# System instruction for the parser model; the request content is just the quoted query
+PARSE_INSTRUCTION = (
+    "Extract Amazon.in product search parameters from the quoted user query. "
+    "Return one JSON object. "
+    "intent is always \"search\". "
+    "products: product categories (\"laptops\") or specific models; for comparisons list each side. "
+    "filters.price: the budget as \"under ₹60000\", \"around ₹40000\" or \"₹30000-₹50000\", else \"any\". "
+    "filters.brand: the lowercase brand, else \"any\". "
+    "attributes: use-case and spec keywords such as \"gaming\", \"16gb ram\", \"office work\". "
+    "max_products_per_query is 5."
+)
+
+# Response schema enforced through Gemini's JSON mode
+AMAZON_QUERY_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "intent": {"type": "STRING"},
+        "products": {"type": "ARRAY", "items": {"type": "STRING"}},
+        "filters": {
+            "type": "OBJECT",
+            "properties": {
+                "price": {"type": "STRING"},
+                "brand": {"type": "STRING"}
+            },
+            "required": ["price", "brand"]
+        },
+        "attributes": {"type": "ARRAY", "items": {"type": "STRING"}},
+        "max_products_per_query": {"type": "INTEGER"}
+    },
+    "required": ["intent", "products", "filters", "attributes", "max_products_per_query"]
+}
+
 class AmazonPromptParser:
     def __init__(self):
         """Initialize the Amazon Prompt Parser with Gemini API"""
+        # normalized query -> (unit embedding or None, parse result), in LRU order
+        self._parse_cache: "OrderedDict[str, tuple]" = OrderedDict()
+        # Stacked embeddings of cached queries, rebuilt lazily after the cache changes
+        self._embedding_matrix: Optional[np.ndarray] = None
+        self._embedding_keys: list = []
+        self._embedding_signatures: Optional[np.ndarray] = None
+        # Parses run in worker threads, so cache reads and writes are serialized
+        self._cache_lock = threading.Lock()
+        self._disk_cache = self._open_disk_cache()
+        self._disk_lock = threading.Lock()
+        
         self.api_key = os.getenv("GEMINI_API_KEY")
         if not self.api_key:
             logger.warning("GEMINI_API_KEY not found in environment variables")
             return
         
-        genai.configure(api_key=self.api_key)
-        self.model = genai.GenerativeModel('gemini-2.0-flash-exp')
+        with _GENAI_INIT_LOCK:
+            genai.configure(api_key=self.api_key)
+            self.model = genai.GenerativeModel(
+                'gemini-2.0-flash-exp',
+                system_instruction=PARSE_INSTRUCTION,
+                generation_config={
+                    "response_mime_type": "application/json",
+                    "response_schema": AMAZON_QUERY_SCHEMA
+                }
+            )
 
     def parse_query_for_amazon(self, user_query: str) -> Dict[str, Any]:
         """
@@ -44,109 +159,255 @@ class AmazonPromptParser:
             logger.error("Gemini API key not configured")
             return self._create_fallback_parse(user_query)
         
-        try:
-            # Construct the parsing prompt
-            prompt = f"""
-You are an expert query parser for e-commerce product searches. Your job is to extract structured information from user queries to search Amazon.in effectively.
-
-CRITICAL: You must respond with ONLY a valid JSON object, no additional text, no markdown formatting, no explanation.
-
-User Query: "{user_query}"
-
-Extract the following information and respond with this exact JSON structure:
+        cached, cache_key, query_embedding = self._lookup_cached(user_query)
+        if cached is not None:
+            return cached
+        
+        parsed_result = self._generate_parse(user_query)
+        if parsed_result is None:
+            return self._create_fallback_parse(user_query)
+        
+        self._cache_parse(cache_key, query_embedding, parsed_result)
+        return copy.deepcopy(parsed_result)
 
-{{
-    "intent": "search",
-    "products": ["category1", "category2"],
-    "filters": {{
-        "price": "extracted price constraint or 'any'",
-        "brand": "extracted brand or 'any'"
-    }},
-    "attributes": ["attribute1", "attribute2"],
-    "max_products_per_query": 5
-}}
+    async def parse_query_for_amazon_async(self, user_query: str) -> Dict[str, Any]:
+        """
+        Coroutine version of parse_query_for_amazon for use inside async routes
+        
+        The Gemini request is awaited with generate_content_async so it does
+        not hold a worker thread; the cache lookup, which may embed the
+        query, and the cache write, which hits SQLite, run in a thread.
+        
+        Args:
+            user_query: The user's natural language query
+            
+        Returns:
+            Dictionary in Amazon scraper format
+        """
+        if not self.api_key:
+            logger.error("Gemini API key not configured")
+            return self._create_fallback_parse(user_query)
+        
+        cached, cache_key, query_embedding = await asyncio.to_thread(self._lookup_cached, user_query)
+        if cached is not None:
+            return cached
+        
+        parsed_result = await self._generate_parse_async(user_query)
+        if parsed_result is None:
+            return self._create_fallback_parse(user_query)
+        
+        await asyncio.to_thread(self._cache_parse, cache_key, query_embedding, parsed_result)
+        return copy.deepcopy(parsed_result)
 
-**Extraction Rules:**
+    def _lookup_cached(self, user_query: str) -> Tuple[Optional[Dict[str, Any]], str, Optional[np.ndarray]]:
+        """
+        Answer the query without Gemini if we can: the regex fast path, then the parse caches
+        
+        Args:
+            user_query: Query to look up
+            
+        Returns:
+            Tuple of (parse result or None on a miss, cache key, query embedding);
+            pass the key and embedding to _cache_parse after parsing a miss
+        """
+        # Trivial queries are fully explained by the regex parser
+        fast_result = self._fast_parse(user_query)
+        if fast_result is not None:
+            logger.info(f"⚡ Parse fast path, skipping Gemini for: {user_query}")
+            return fast_result, "", None
+        
+        # Exact match on the normalized query, then a semantic match on its embedding
+        cache_key = self._normalize_query(user_query)
+        with self._cache_lock:
+            cached = self._parse_cache.get(cache_key)
+            if cached is not None:
+                self._parse_cache.move_to_end(cache_key)
+        if cached is not None:
+            logger.debug(f"Parse cache hit (exact): {user_query}")
+            return copy.deepcopy(cached[1]), cache_key, cached[0]
+        
+        # Parses persisted by an earlier process are promoted into memory
+        stored = self._disk_get(cache_key)
+        if stored is not None:
+            logger.debug(f"Parse cache hit (disk): {user_query}")
+            self._cache_parse(cache_key, None, stored, persist=False)
+            return stored, cache_key, None
+        
+        query_embedding = self._embed_query(cache_key)
+        with self._cache_lock:
+            similar = self._find_similar(query_embedding, query_signature(cache_key))
+        if similar is not None:
+            logger.debug(f"Parse cache hit (semantic): {user_query}")
+            return copy.deepcopy(similar), cache_key, query_embedding
+        
+        return None, cache_key, query_embedding
 
-1. **products**: Main product categories (e.g., ["laptops"], ["phones"], ["headphones"])
-   - For comparisons like "iPhone vs Samsung": extract both brands as ["iphone", "samsung galaxy"]
-   - For specific models: ["iphone 15", "samsung galaxy s24"]
+    def _generate_parse(self, user_query: str) -> Optional[Dict[str, Any]]:
+        """
+        Ask Gemini to parse a query
+        
+        Args:
+            user_query: Query to parse (cache misses only)
+            
+        Returns:
+            The validated parse result, or None if the response was missing or malformed
+        """
+        try:
+            logger.info(f"Parsing query for Amazon: {user_query}")
+            response = self.model.generate_content(f'"{user_query}"')
+            return self._read_response(response.text, user_query)
+        except Exception as e:
+            logger.error(f"Error in Amazon prompt parser: {e}")
+            return None
 
-2. **filters.price**: 
-   - Extract budget constraints: "under 60000" → "under ₹60000"
-   - Extract ranges: "between 30000 and 50000" → "₹30000-₹50000"  
-   - If no price mentioned: "any"
+    async def _generate_parse_async(self, user_query: str) -> Optional[Dict[str, Any]]:
+        """Coroutine version of _generate_parse using generate_content_async"""
+        try:
+            logger.info(f"Parsing query for Amazon: {user_query}")
+            response = await self.model.generate_content_async(f'"{user_query}"')
+            return self._read_response(response.text, user_query)
+        except Exception as e:
+            logger.error(f"Error in Amazon prompt parser: {e}")
+            return None
 
-3. **filters.brand**:
-   - Extract specific brands: "hp laptops" → "hp"
-   - For brand comparisons: use dominant brand or "any"
-   - If no brand mentioned: "any"
+    def _read_response(self, response_text: str, user_query: str) -> Optional[Dict[str, Any]]:
+        """
+        Extract and validate the JSON object from a Gemini parse response
+        
+        Args:
+            response_text: Raw model output
+            user_query: The query the response should cover
+            
+        Returns:
+            The validated parse result, or None if missing or malformed
+        """
+        if not response_text:
+            logger.warning("No response from parser, using fallback")
+            return None
+        
+        try:
+            # JSON mode returns bare JSON
+            parsed_result = orjson.loads(response_text)
+        except orjson.JSONDecodeError as e:
+            logger.error(f"Failed to parse JSON response: {e}")
+            logger.debug(f"Raw response: {response_text}")
+            return None
+        
+        if isinstance(parsed_result, dict) and self._validate_parse_result(parsed_result):
+            logger.info(f"Successfully parsed query: {parsed_result}")
+            return parsed_result
+        
+        logger.warning(f"Invalid parse result structure for '{user_query}', using fallback")
+        return None
 
-4. **attributes**: 
-   - Extract descriptive keywords: ["gaming", "intel", "professional", "lightweight", "4k"]
-   - Technical specs: ["i5", "16gb ram", "ssd"]
-   - Use cases: ["office work", "video editing", "students"]
+    @staticmethod
+    def _normalize_query(user_query: str) -> str:
+        """Lowercase and collapse whitespace so trivially different queries share a cache key"""
+        return " ".join(user_query.lower().split())
 
-**Examples:**
+    def _embed_query(self, normalized_query: str) -> Optional[np.ndarray]:
+        """Embed a normalized query as a unit vector, or return None if embedding fails"""
+        try:
+            result = genai.embed_content(model=EMBEDDING_MODEL, content=normalized_query)
+            embedding = np.asarray(result["embedding"], dtype=np.float32)
+            norm = np.linalg.norm(embedding)
+            return embedding / norm if norm else None
+        except Exception as e:
+            logger.warning(f"Query embedding failed, skipping semantic cache: {e}")
+            return None
 
-Query: "best gaming laptops under 60000"
-Response: {{"intent": "search", "products": ["laptops"], "filters": {{"price": "under ₹60000", "brand": "any"}}, "attributes": ["gaming"], "max_products_per_query": 5}}
+    def _find_similar(self, query_embedding: Optional[np.ndarray], signature: str) -> Optional[Dict[str, Any]]:
+        """
+        Return the cached parse of the most similar earlier query above the threshold
+        
+        Only queries with the same amounts and brand names (see query_signature)
+        can match. Call with the cache lock held.
+        """
+        if query_embedding is None:
+            return None
+        
+        if self._embedding_matrix is None:
+            self._embedding_keys = [key for key, (emb, _) in self._parse_cache.items() if emb is not None]
+            if not self._embedding_keys:
+                return None
+            self._embedding_matrix = np.vstack([self._parse_cache[key][0] for key in self._embedding_keys])
+            self._embedding_signatures = np.array([query_signature(key) for key in self._embedding_keys], dtype=object)
+        
+        # Rows are unit vectors, so the dot product is the cosine similarity
+        similarities = self._embedding_matrix @ query_embedding
+        similarities[self._embedding_signatures != signature] = -1.0
+        best = int(np.argmax(similarities))
+        if similarities[best] < SEMANTIC_MATCH_THRESHOLD:
+            return None
+        
+        key = self._embedding_keys[best]
+        self._parse_cache.move_to_end(key)
+        return self._parse_cache[key][1]
 
-Query: "compare iPhone 15 vs Samsung Galaxy S24"  
-Response: {{"intent": "search", "products": ["iphone 15", "samsung galaxy s24"], "filters": {{"price": "any", "brand": "any"}}, "attributes": ["flagship", "premium"], "max_products_per_query": 5}}
+    def _cache_parse(self, cache_key: str, query_embedding: Optional[np.ndarray], result: Dict[str, Any],
+                     persist: bool = True):
+        """Store a successful LLM parse, evicting the least recently used entry when full"""
+        with self._cache_lock:
+            self._parse_cache[cache_key] = (query_embedding, copy.deepcopy(result))
+            self._parse_cache.move_to_end(cache_key)
+            if len(self._parse_cache) > PARSE_CACHE_SIZE:
+                self._parse_cache.popitem(last=False)
+            self._embedding_matrix = None
+        
+        if persist:
+            self._disk_set(cache_key, result)
 
-Query: "HP laptops for office work around 40000"
-Response: {{"intent": "search", "products": ["laptops"], "filters": {{"price": "around ₹40000", "brand": "hp"}}, "attributes": ["office work", "professional"], "max_products_per_query": 5}}
+    def _open_disk_cache(self) -> Optional[sqlite3.Connection]:
+        """Open (or create) the SQLite parse cache, or return None if it is disabled or unavailable"""
+        if not PARSE_CACHE_PATH:
+            return None
+        try:
+            os.makedirs(os.path.dirname(PARSE_CACHE_PATH) or ".", exist_ok=True)
+            conn = sqlite3.connect(PARSE_CACHE_PATH, check_same_thread=False)
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS parse_cache "
+                "(key TEXT PRIMARY KEY, result TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            conn.execute("DELETE FROM parse_cache WHERE expires_at < ?", (time.time(),))
+            conn.commit()
+            return conn
+        except (sqlite3.Error, OSError) as e:
+            logger.warning(f"Parse disk cache unavailable at {PARSE_CACHE_PATH}: {e}")
+            return None
 
-Now parse this query: "{user_query}"
+    @staticmethod
+    def _disk_key(cache_key: str) -> str:
+        """Hash a normalized query into a fixed-length disk cache key"""
+        return hashlib.sha256(cache_key.encode("utf-8")).hexdigest()
 
-JSON Response:"""
+    def _disk_get(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        """Read an unexpired parse from the disk cache"""
+        if self._disk_cache is None:
+            return None
+        try:
+            with self._disk_lock:
+                row = self._disk_cache.execute(
+                    "SELECT result FROM parse_cache WHERE key = ? AND expires_at >= ?",
+                    (self._disk_key(cache_key), time.time())
+                ).fetchone()
+            return orjson.loads(row[0]) if row else None
+        except (sqlite3.Error, orjson.JSONDecodeError) as e:
+            logger.warning(f"Parse disk cache read failed: {e}")
+            return None
 
-            logger.info(f"Parsing query for Amazon: {user_query}")
-            
-            # Generate the parsing result
-            response = self.model.generate_content(prompt)
-            
-            if response.text:
-                try:
-                    # Clean the response text to extract JSON
-                    response_text = response.text.strip()
-                    
-                    # Try to find JSON in the response
-                    json_start = response_text.find('{')
-                    json_end = response_text.rfind('}') + 1
-                    
-                    if json_start != -1 and json_end > json_start:
-                        json_text = response_text[json_start:json_end]
-                    else:
-                        json_text = response_text
-                    
-                    # Parse the JSON response from the LLM
-                    parsed_result = json.loads(json_text)
-                    
-                    # Validate the response structure
-                    if self._validate_parse_result(parsed_result):
-                        logger.info(f"Successfully parsed query: {parsed_result}")
-                        return parsed_result
-                    else:
-                        logger.warning("Invalid parse result structure, using fallback")
-                        return self._create_fallback_parse(user_query)
-                    
-                except json.JSONDecodeError as e:
-                    logger.error(f"Failed to parse JSON response: {e}")
-                    logger.debug(f"Raw response: {response.text}")
-                    return self._create_fallback_parse(user_query)
-                except Exception as e:
-                    logger.error(f"Error processing parse response: {e}")
-                    return self._create_fallback_parse(user_query)
-            
-            # Fallback if no response
-            logger.warning("No response from parser, using fallback")
-            return self._create_fallback_parse(user_query)
-            
-        except Exception as e:
-            logger.error(f"Error in Amazon prompt parser: {e}")
-            return self._create_fallback_parse(user_query)
+    def _disk_set(self, cache_key: str, result: Dict[str, Any]):
+        """Write a parse to the disk cache with a PARSE_CACHE_TTL expiry"""
+        if self._disk_cache is None:
+            return
+        try:
+            with self._disk_lock:
+                self._disk_cache.execute(
+                    "INSERT OR REPLACE INTO parse_cache (key, result, expires_at) VALUES (?, ?, ?)",
+                    (self._disk_key(cache_key), orjson.dumps(result), time.time() + PARSE_CACHE_TTL)
+                )
+                self._disk_cache.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Parse disk cache write failed: {e}")
 
     def _validate_parse_result(self, result: Dict[str, Any]) -> bool:
         """Validate that the parse result has the correct structure"""
@@ -166,70 +427,110 @@ JSON Response:"""
             
         return True
 
+    def _fast_parse(self, user_query: str) -> Optional[Dict[str, Any]]:
+        """
+        Return the regex parse when it explains the whole query, so the LLM can be skipped
+        
+        The query qualifies when a known product keyword is present, it has
+        no shorthand or comma-grouped amount, and at least
+        FAST_PATH_MIN_COVERAGE of its tokens are covered by a product, price,
+        brand or attribute match.
+        """
+        query_lower = user_query.lower()
+        if _COMPOUND_AMOUNT_RE.search(query_lower):
+            return None
+        fields, matched_spans = _scan_query(query_lower)
+        if fields["product"] is None:
+            return None
+        
+        tokens = [match.span() for match in _TOKEN_RE.finditer(query_lower)]
+        if _covered_tokens(tokens, matched_spans) / len(tokens) < FAST_PATH_MIN_COVERAGE:
+            return None
+        
+        return _build_fallback_result(user_query, fields)
+
     def _create_fallback_parse(self, user_query: str) -> Dict[str, Any]:
         """Create a fallback parse result using simple regex patterns"""
         logger.info(f"Creating fallback parse for: {user_query}")
+        fields, _ = _scan_query(user_query.lower())
+        return _build_fallback_result(user_query, fields)
+
+def _scan_query(query_lower: str) -> Tuple[Dict[str, Any], List[Tuple[int, int]]]:
+    """
+    Extract fallback parse fields from a lowercased query in a single regex pass
+    
+    Args:
+        query_lower: The lowercased user query
         
-        # Simple fallback logic
-        query_lower = user_query.lower()
-        
-        # Extract products using common patterns
-        products = []
-        if "laptop" in query_lower:
-            products.append("laptops")
-        elif "phone" in query_lower or "mobile" in query_lower:
-            products.append("phones")
-        elif "headphone" in query_lower or "earphone" in query_lower:
-            products.append("headphones")
-        elif "tablet" in query_lower:
-            products.append("tablets")
-        else:
-            # Use the first word as product type
-            products.append(user_query.split()[0])
-        
-        # Extract price using regex
-        price_filter = "any"
-        price_patterns = [
-            r"under\s*₹?(\d+)",
-            r"below\s*₹?(\d+)", 
-            r"less than\s*₹?(\d+)",
-            r"budget\s*₹?(\d+)"
-        ]
-        
-        for pattern in price_patterns:
-            match = re.search(pattern, query_lower)
-            if match:
-                price_filter = f"under ₹{match.group(1)}"
-                break
-        
-        # Extract brand
-        brand_filter = "any"
-        common_brands = ["hp", "dell", "lenovo", "asus", "acer", "apple", "samsung", "oneplus", "xiaomi", "realme"]
-        for brand in common_brands:
-            if brand in query_lower:
-                brand_filter = brand
-                break
-        
-        # Extract attributes
-        attributes = []
-        common_attributes = ["gaming", "office", "student", "professional", "lightweight", "premium", "budget"]
-        for attr in common_attributes:
-            if attr in query_lower:
-                attributes.append(attr)
-        
-        return {
-            "intent": "search",
-            "products": products,
-            "filters": {
-                "price": price_filter,
-                "brand": brand_filter
-            },
-            "attributes": attributes,
-            "max_products_per_query": 5
-        }
+    Returns:
+        Tuple of (fields with the first product, price amount and brand found
+        plus all attributes in order, spans of every match)
+    """
+    fields: Dict[str, Any] = {"product": None, "price": None, "brand": None, "attributes": []}
+    spans = []
+    
+    for match in _FALLBACK_RE.finditer(query_lower):
+        spans.append(match.span())
+        kind = match.lastgroup if match.lastgroup != "amount" else "price"
+        if kind == "attribute":
+            fields["attributes"].append(match.group("attribute"))
+        elif kind == "price":
+            if fields["price"] is None:
+                fields["price"] = match.group("amount")
+            # "budget" is also an attribute when it introduces a price
+            if match.group("price").startswith("budget"):
+                fields["attributes"].append("budget")
+        elif fields[kind] is None:
+            fields[kind] = match.group(kind)
+    
+    return fields, spans
+
+def _covered_tokens(tokens: List[Tuple[int, int]], spans: List[Tuple[int, int]]) -> int:
+    """
+    Count tokens covered by a match span from their first character, in one merge pass
+    
+    A match that starts mid-token ("phone" in "iphone") leaves the token
+    uncovered, since the unmatched prefix is usually a model or brand name.
+    Both lists come from finditer, so they are sorted and each is non-overlapping.
+    """
+    covered = 0
+    i = 0
+    for start, _ in tokens:
+        # Spans ending at or before this token can't overlap it or any later token
+        while i < len(spans) and spans[i][1] <= start:
+            i += 1
+        if i < len(spans) and spans[i][0] <= start:
+            covered += 1
+    return covered
+
+def _build_fallback_result(user_query: str, fields: Dict[str, Any]) -> Dict[str, Any]:
+    """Assemble the Amazon scraper format from scanned fallback fields"""
+    # Use the first word as product type when no known product keyword was found
+    product = fields["product"]
+    products = [_PRODUCT_CATEGORIES[product] if product else user_query.split()[0]]
+    
+    return {
+        "intent": "search",
+        "products": products,
+        "filters": {
+            "price": f"under ₹{fields['price']}" if fields["price"] else "any",
+            "brand": fields["brand"] or "any"
+        },
+        # Deduplicated, in order of appearance
+        "attributes": list(dict.fromkeys(fields["attributes"])),
+        "max_products_per_query": 5
+    }
 
-# Global instance
-amazon_parser = AmazonPromptParser()
+@lru_cache(maxsize=1)
+def get_amazon_parser() -> AmazonPromptParser:
+    """
+    Return the shared AmazonPromptParser, creating it on first use.
+    
+    Deferring construction keeps Gemini configuration, model creation and the
+    disk cache open out of import time, and skips them entirely for workers
+    that never parse a query.
+    """
+    return AmazonPromptParser()
 
 def parse_query_for_amazon(user_query: str) -> Dict[str, Any]:
     """
@@ -241,4 +542,16 @@ def parse_query_for_amazon(user_query: str) -> Dict[str, Any]:
     Returns:
         Dictionary in Amazon scraper format
     """
-    return amazon_parser.parse_query_for_amazon(user_query)
+    return get_amazon_parser().parse_query_for_amazon(user_query)
+
+async def parse_query_for_amazon_async(user_query: str) -> Dict[str, Any]:
+    """
+    Convenience coroutine to parse user queries for Amazon scraper from async code
+    
+    Args:
+        user_query: The user's natural language query
+        
+    Returns:
+        Dictionary in Amazon scraper format
+    """
+    return await get_amazon_parser().parse_query_for_amazon_async(user_query)
@@ -3,77 +3,158 @@ Chart Generation Utility for Prompt2Insight
 Generates server-side chart images from product data using matplotlib
 """
 
-import matplotlib.pyplot as plt
-import matplotlib.patches as mpatches
 import io
 import base64
 import logging
-from typing import List, Dict, Any, Optional
+import threading
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Tuple, Union
 import numpy as np
 
-# Set matplotlib to use non-GUI backend
 import matplotlib
-matplotlib.use('Agg')
+from matplotlib import font_manager
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import PatchCollection
+from matplotlib.figure import Figure
+from matplotlib.patches import Rectangle
+from matplotlib.ticker import FuncFormatter
+
+from app.core.fast_chart import render_price_bar_chart
+from app.core.product_table import ProductTable, build_product_table, price_order
 
 logger = logging.getLogger(__name__)
 
-def generate_price_chart_image(products: List[Dict[str, Any]]) -> Optional[str]:
+# Labels are plain text (product names, ₹ prices), so skip mathtext parsing,
+# and let Agg simplify paths more aggressively
+matplotlib.rcParams.update({
+    'text.parse_math': False,
+    'path.simplify': True,
+    'path.simplify_threshold': 1.0
+})
+
+# Resolve the default font at import instead of on the first chart request
+font_manager.findfont('DejaVu Sans')
+
+# Per-thread figures and buffers, reused across chart calls. Charts are rendered
+# in worker threads, so each thread keeps its own and pyplot's global state is avoided.
+_FIG_POOL = threading.local()
+
+def _get_figure(name: str, figsize: Tuple[float, float], polar: bool = False):
+    """
+    Return this thread's reusable figure for a chart type, cleared and resized.
+    
+    Args:
+        name: Chart type key, one figure is kept per type
+        figsize: Figure size in inches
+        polar: Whether the axes use a polar projection
+        
+    Returns:
+        Tuple of (figure, axes)
+    """
+    fig = getattr(_FIG_POOL, name, None)
+    if fig is None:
+        fig = Figure()
+        FigureCanvasAgg(fig)
+        setattr(_FIG_POOL, name, fig)
+    
+    fig.clear()
+    fig.set_size_inches(*figsize)
+    ax = fig.add_subplot(projection='polar' if polar else None)
+    return fig, ax
+
+@lru_cache(maxsize=32)
+def _gradient(n: int) -> np.ndarray:
+    """Sample n colors from green (cheapest) to red (most expensive); cached read-only per n."""
+    colors = matplotlib.colormaps['RdYlGn_r'](np.linspace(0.2, 0.8, n))
+    colors.flags.writeable = False
+    return colors
+
+def _encode_figure(fig: Figure, **savefig_kwargs) -> str:
+    """Render a figure to PNG in this thread's reusable buffer and return it base64 encoded."""
+    buffer = getattr(_FIG_POOL, 'buffer', None)
+    if buffer is None:
+        buffer = _FIG_POOL.buffer = io.BytesIO()
+    buffer.seek(0)
+    buffer.truncate(0)
+    
+    # zlib level 1 encodes several times faster than the default for a slightly larger PNG
+    fig.savefig(buffer, format='png', pil_kwargs={'compress_level': 1}, **savefig_kwargs)
+    return base64.b64encode(buffer.getvalue()).decode('utf-8')
+
+def generate_price_chart_image(products: Union[List[Dict[str, Any]], ProductTable]) -> Optional[str]:
     """
     Generate a horizontal bar chart image for product price comparison
     
     Args:
-        products: List of product dictionaries with name, price_value, price_display
+        products: List of product dictionaries with name, price_value, price_display,
+            or a ProductTable already built from them
         
     Returns:
         Base64 encoded PNG image string, or None if generation fails
     """
     try:
-        if not products:
+        table = products if isinstance(products, dict) else build_product_table(products)
+        
+        if len(table['name']) == 0:
             logger.warning("No products provided for chart generation")
             return None
         
-        # Filter products with valid prices
-        valid_products = [
-            p for p in products 
-            if p.get('price_value') and isinstance(p.get('price_value'), (int, float)) and p.get('price_value') > 0
-        ]
+        # Keep products with valid prices, sorted by price (ascending)
+        valid = price_order(table)
         
-        if not valid_products:
+        if valid.size == 0:
             logger.warning("No products with valid prices found")
             return None
         
-        # Sort products by price (ascending)
-        valid_products.sort(key=lambda x: x['price_value'])
-        
         # Extract data for plotting
-        names = [p.get('name', 'Unknown')[:25] + ('...' if len(p.get('name', '')) > 25 else '') for p in valid_products]
-        prices = [p['price_value'] for p in valid_products]
-        price_displays = [p.get('price_display', f"₹{p['price_value']:,}") for p in valid_products]
+        prices = table['price_value'][valid]
+        names = [name[:25] + ('...' if len(name) > 25 else '') for name in table['name'][valid]]
+        price_displays = table['price_display'][valid]
         
-        # Create figure with appropriate size
-        fig, ax = plt.subplots(figsize=(12, max(6, len(valid_products) * 0.8)))
+        # Format labels only for the rows that came without a price_display
+        missing = np.equal(price_displays, None)
+        if missing.any():
+            price_displays[missing] = [f"₹{price:,.0f}" for price in prices[missing]]
+        price_displays = price_displays.tolist()
         
         # Color scheme - gradient from green (cheapest) to red (most expensive)
-        colors = plt.cm.RdYlGn_r(np.linspace(0.2, 0.8, len(valid_products)))
-        
-        # Create horizontal bar chartvs
-        bars = ax.barh(names, prices, color=colors, edgecolor='white', linewidth=1)
+        colors = _gradient(valid.size)
+        
+        # Fast path: draw the bar chart directly with Pillow
+        try:
+            png = render_price_bar_chart(names, prices, price_displays, colors)
+            logger.info(f"Successfully generated price chart for {valid.size} products")
+            return base64.b64encode(png).decode('utf-8')
+        except Exception as e:
+            logger.warning(f"Fast price chart failed, falling back to matplotlib: {e}")
+        
+        # Reuse this thread's price figure at the appropriate size
+        fig, ax = _get_figure('price_fig', (12, max(6, valid.size * 0.8)))
+        
+        # Draw all bars as one collection at explicit row positions
+        rows = np.arange(valid.size)
+        bars = [Rectangle((0, row - 0.4), price, 0.8) for row, price in zip(rows, prices)]
+        ax.add_collection(PatchCollection(bars, facecolors=colors, edgecolors='white', linewidths=1))
+        ax.set_yticks(rows)
+        ax.set_yticklabels(names)
+        ax.set_ylim(-0.6, valid.size - 0.4)
+        ax.set_xlim(0, prices.max() * 1.1)
         
         # Customize the chart
         ax.set_xlabel('Price (₹)', fontsize=12, fontweight='bold')
         ax.set_title('Product Price Comparison', fontsize=16, fontweight='bold', pad=20)
         
         # Format x-axis to show currency
-        ax.xaxis.set_major_formatter(plt.FuncFormatter(lambda x, p: f'₹{x:,.0f}'))
+        ax.xaxis.set_major_formatter(FuncFormatter(lambda x, p: f'₹{x:,.0f}'))
         
-        # Add price labels on the bars
-        for i, (bar, price_display) in enumerate(zip(bars, price_displays)):
-            width = bar.get_width()
-            ax.text(width + max(prices) * 0.01, bar.get_y() + bar.get_height()/2, 
-                   price_display, ha='left', va='center', fontweight='bold', fontsize=10)
+        # Add price labels just past the end of each bar
+        label_offset = prices.max() * 0.01
+        for row, price, price_display in zip(rows, prices, price_displays):
+            ax.text(price + label_offset, row, price_display,
+                    ha='left', va='center', fontweight='bold', fontsize=10)
         
         # Adjust layout to prevent label cutoff
-        plt.subplots_adjust(left=0.3, right=0.85, top=0.9, bottom=0.1)
+        fig.subplots_adjust(left=0.3, right=0.85, top=0.9, bottom=0.1)
         
         # Style improvements
         ax.grid(axis='x', alpha=0.3, linestyle='--')
@@ -87,129 +168,102 @@ def generate_price_chart_image(products: List[Dict[str, Any]]) -> Optional[str]:
         ax.set_facecolor('#fafafa')
         fig.patch.set_facecolor('white')
         
-        # Save plot to memory buffer
-        buffer = io.BytesIO()
-        plt.savefig(buffer, format='png', dpi=150, bbox_inches='tight', 
-                   facecolor='white', edgecolor='none')
-        buffer.seek(0)
-        
-        # Encode to base64
-        image_base64 = base64.b64encode(buffer.getvalue()).decode('utf-8')
+        # Render to PNG and encode to base64
+        image_base64 = _encode_figure(fig, dpi=100, facecolor='white', edgecolor='none')
         
-        # Clean up
-        plt.close(fig)
-        buffer.close()
-        
-        logger.info(f"Successfully generated price chart for {len(valid_products)} products")
+        logger.info(f"Successfully generated price chart for {valid.size} products")
         return image_base64
         
     except Exception as e:
         logger.error(f"Error generating price chart: {e}")
         return None
 
-def generate_specs_chart_image(products: List[Dict[str, Any]]) -> Optional[str]:
+def generate_specs_chart_image(products: Union[List[Dict[str, Any]], ProductTable]) -> Optional[str]:
     """
     Generate a radar/spider chart image for product specifications comparison
     
     Args:
-        products: List of product dictionaries with name and specs
+        products: List of product dictionaries with name and specs,
+            or a ProductTable already built from them
         
     Returns:
         Base64 encoded PNG image string, or None if generation fails
     """
     try:
-        if not products:
+        table = products if isinstance(products, dict) else build_product_table(products)
+        
+        if len(table['name']) == 0:
             logger.warning("No products provided for specs chart generation")
             return None
         
-        # Filter products with valid specs
-        valid_products = []
-        for p in products:
-            specs = p.get('specs', {})
-            if specs and any([
-                specs.get('ram_gb', 0) > 0,
-                specs.get('storage_gb', 0) > 0,
-                specs.get('battery_mah', 0) > 0
-            ]):
-                valid_products.append(p)
-        
-        if not valid_products:
+        # Spec values: one row per product, one column per category
+        spec_cols = np.column_stack((
+            table['ram_gb'],
+            table['storage_gb'],
+            table['battery_mah'] / 100  # Scale down battery for better visualization
+        ))
+        
+        # Keep products with at least one spec, limited to the first 4 for readability
+        valid = np.flatnonzero((spec_cols > 0).any(axis=1))[:4]
+        
+        if valid.size == 0:
             logger.warning("No products with valid specs found")
             return None
         
-        # Limit to first 4 products for readability
-        valid_products = valid_products[:4]
+        spec_arr = spec_cols[valid]
+        names = table['name'][valid]
         
         # Define spec categories
         categories = ['RAM (GB)', 'Storage (GB)', 'Battery (mAh)']
         
-        # Prepare data
-        fig, ax = plt.subplots(figsize=(10, 10), subplot_kw=dict(projection='polar'))
+        # Reuse this thread's polar specs figure
+        fig, ax = _get_figure('specs_fig', (10, 10), polar=True)
         
         # Number of variables
         N = len(categories)
         
-        # Angles for each category
-        angles = [n / float(N) * 2 * np.pi for n in range(N)]
-        angles += angles[:1]  # Complete the circle
+        # Angles for each category, with the first repeated to complete the circle
+        angles = np.linspace(0, 2 * np.pi, N, endpoint=False)
+        angles = np.append(angles, angles[0])
         
         # Colors for different products
         colors = ['#FF6B6B', '#4ECDC4', '#45B7D1', '#FFA726', '#AB47BC']
         
+        # Close every product's polygon at once by repeating the first column
+        closed_values = np.hstack((spec_arr, spec_arr[:, :1]))
+        
         # Plot each product
-        for i, product in enumerate(valid_products):
-            specs = product.get('specs', {})
-            
-            # Extract spec values
-            values = [
-                specs.get('ram_gb', 0),
-                specs.get('storage_gb', 0),
-                specs.get('battery_mah', 0) / 100  # Scale down battery for better visualization
-            ]
-            values += values[:1]  # Complete the circle
-            
-            # Plot
-            product_name = product.get('name', 'Unknown')[:20]
+        for i, (name, values) in enumerate(zip(names, closed_values)):
+            product_name = name[:20]
             ax.plot(angles, values, 'o-', linewidth=2, label=product_name, color=colors[i])
             ax.fill(angles, values, alpha=0.25, color=colors[i])
         
         # Customize the chart
         ax.set_xticks(angles[:-1])
         ax.set_xticklabels(categories, fontsize=12)
-        ax.set_ylim(0, max([
-            max([specs.get('ram_gb', 0) for specs in [p.get('specs', {}) for p in valid_products]]),
-            max([specs.get('storage_gb', 0) for specs in [p.get('specs', {}) for p in valid_products]]),
-            max([specs.get('battery_mah', 0) / 100 for specs in [p.get('specs', {}) for p in valid_products]])
-        ]) * 1.1)
+        ax.set_ylim(0, spec_arr.max() * 1.1)
         
         # Add title
-        plt.title('Product Specifications Comparison', size=16, fontweight='bold', y=1.08)
+        ax.set_title('Product Specifications Comparison', size=16, fontweight='bold', y=1.08)
         
         # Add legend
-        plt.legend(loc='upper right', bbox_to_anchor=(1.3, 1.0))
+        ax.legend(loc='upper right', bbox_to_anchor=(1.3, 1.0))
         
         # Add note about battery scaling
-        plt.figtext(0.5, 0.02, '* Battery values scaled down by 100 for better visualization', 
+        fig.text(0.5, 0.02, '* Battery values scaled down by 100 for better visualization', 
                    ha='center', fontsize=10, style='italic')
         
         # Style improvements
         ax.grid(True, alpha=0.3)
         fig.patch.set_facecolor('white')
         
-        # Save plot to memory buffer
-        buffer = io.BytesIO()
-        plt.savefig(buffer, format='png', dpi=150, bbox_inches='tight', 
-                   facecolor='white', edgecolor='none')
-        buffer.seek(0)
-        
-        # Encode to base64
-        image_base64 = base64.b64encode(buffer.getvalue()).decode('utf-8')
+        # Leave room for the title and the legend outside the axes
+        fig.subplots_adjust(left=0.08, right=0.72, top=0.85, bottom=0.1)
         
-        # Clean up
-        plt.close(fig)
-        buffer.close()
+        # Render to PNG and encode to base64
+        image_base64 = _encode_figure(fig, dpi=100, facecolor='white', edgecolor='none')
         
-        logger.info(f"Successfully generated specs chart for {len(valid_products)} products")
+        logger.info(f"Successfully generated specs chart for {valid.size} products")
         return image_base64
         
     except Exception as e:
@@ -0,0 +1,17 @@
+"""
+Concurrency limits for Prompt2Insight
+Shared semaphores that cap how many heavy upstream calls run at once
+"""
+
+import asyncio
+import os
+
+# Maximum concurrent Amazon scrapes (scrape.do requests)
+SCRAPE_CONCURRENCY = int(os.getenv("P2I_SCRAPE_CONCURRENCY", "8"))
+
+# Maximum concurrent RAG pipeline runs (retrieval + LLM generation)
+RAG_CONCURRENCY = int(os.getenv("P2I_RAG_CONCURRENCY", "4"))
+
+# Shared across all endpoints so the limits apply process-wide
+scrape_semaphore = asyncio.Semaphore(SCRAPE_CONCURRENCY)
+rag_semaphore = asyncio.Semaphore(RAG_CONCURRENCY)
@@ -0,0 +1,117 @@
+"""
+Fast Chart Renderer for Prompt2Insight
+Draws the price comparison bar chart directly with Pillow, skipping matplotlib's layout engine
+"""
+
+import io
+import math
+import os
+from functools import lru_cache
+from typing import List
+
+import numpy as np
+import matplotlib
+from PIL import Image, ImageDraw, ImageFont
+
+# Canvas layout, matching the matplotlib price chart at 100 DPI
+WIDTH = 1200
+MIN_HEIGHT = 600
+ROW_HEIGHT = 80
+MARGIN_LEFT = 0.3
+MARGIN_RIGHT = 0.85
+MARGIN_TOP = 0.1
+MARGIN_BOTTOM = 0.1
+BAR_FILL = 0.8  # Fraction of each row covered by its bar
+
+BACKGROUND = (255, 255, 255)
+PLOT_BACKGROUND = (250, 250, 250)
+GRID_COLOR = (225, 225, 225)
+TEXT_COLOR = (0, 0, 0)
+
+# DejaVu Sans ships with matplotlib and includes the ₹ glyph
+_FONT_DIR = os.path.join(matplotlib.get_data_path(), "fonts", "ttf")
+
+@lru_cache(maxsize=None)
+def _font(size: int, bold: bool = False) -> ImageFont.FreeTypeFont:
+    """Load and cache a DejaVu Sans font at the given pixel size."""
+    name = "DejaVuSans-Bold.ttf" if bold else "DejaVuSans.ttf"
+    return ImageFont.truetype(os.path.join(_FONT_DIR, name), size)
+
+def _nice_ticks(max_value: float, target: int = 5) -> np.ndarray:
+    """Return evenly spaced round tick values from 0 covering max_value."""
+    raw_step = max_value / target
+    magnitude = 10 ** math.floor(math.log10(raw_step))
+    step = next(m * magnitude for m in (1, 2, 2.5, 5, 10) if m * magnitude >= raw_step)
+    return np.arange(0, max_value + step, step)
+
+def render_price_bar_chart(names: List[str], prices: np.ndarray, labels: List[str],
+                           colors: np.ndarray) -> bytes:
+    """
+    Render a horizontal price bar chart as PNG bytes.
+
+    Args:
+        names: Product names, one per bar (cheapest first)
+        prices: Product prices as a float array aligned with names
+        labels: Price labels drawn at the end of each bar
+        colors: RGBA colors in 0-1 floats, one row per bar
+
+    Returns:
+        PNG image bytes
+    """
+    count = len(names)
+    height = max(MIN_HEIGHT, count * ROW_HEIGHT)
+
+    plot_left = int(WIDTH * MARGIN_LEFT)
+    plot_right = int(WIDTH * MARGIN_RIGHT)
+    plot_top = int(height * MARGIN_TOP)
+    plot_bottom = int(height * (1 - MARGIN_BOTTOM))
+    plot_width = plot_right - plot_left
+
+    # Leave headroom past the longest bar, as matplotlib's autoscale margin does
+    ticks = _nice_ticks(float(prices.max()) * 1.05)
+    scale = plot_width / ticks[-1]
+
+    # Vectorized bar geometry; the first (cheapest) product sits at the bottom
+    row_height = (plot_bottom - plot_top) / count
+    bar_widths = (prices * scale).astype(int)
+    row_centers = plot_bottom - (np.arange(count) + 0.5) * row_height
+    half_bar = row_height * BAR_FILL / 2
+    rgb = (np.asarray(colors)[:, :3] * 255).astype(int)
+
+    img = Image.new("RGB", (WIDTH, height), BACKGROUND)
+    draw = ImageDraw.Draw(img)
+    draw.rectangle((plot_left, plot_top, plot_right, plot_bottom), fill=PLOT_BACKGROUND)
+
+    # Vertical grid lines and x-axis tick labels
+    tick_font = _font(12)
+    for tick in ticks:
+        x = plot_left + int(tick * scale)
+        draw.line((x, plot_top, x, plot_bottom), fill=GRID_COLOR, width=1)
+        draw.text((x, plot_bottom + 8), f"₹{tick:,.0f}", fill=TEXT_COLOR, font=tick_font, anchor="mt")
+
+    # Bars, product names and price labels
+    name_font = _font(13)
+    label_font = _font(13, bold=True)
+    label_offset = int(float(prices.max()) * 0.01 * scale)
+    for i in range(count):
+        y = row_centers[i]
+        x_end = plot_left + bar_widths[i]
+        draw.rectangle((plot_left, int(y - half_bar), x_end, int(y + half_bar)),
+                       fill=tuple(rgb[i]), outline=BACKGROUND)
+        draw.text((plot_left - 8, y), names[i], fill=TEXT_COLOR, font=name_font, anchor="rm")
+        draw.text((x_end + label_offset, y), labels[i], fill=TEXT_COLOR, font=label_font, anchor="lm")
+
+    # Left and bottom axis lines (top and right spines are hidden in the matplotlib version)
+    draw.line((plot_left, plot_top, plot_left, plot_bottom), fill=TEXT_COLOR, width=1)
+    draw.line((plot_left, plot_bottom, plot_right, plot_bottom), fill=TEXT_COLOR, width=1)
+
+    # Axis label and title
+    draw.text(((plot_left + plot_right) // 2, plot_bottom + 36), "Price (₹)",
+              fill=TEXT_COLOR, font=_font(16, bold=True), anchor="mt")
+    draw.text(((plot_left + plot_right) // 2, plot_top - 20), "Product Price Comparison",
+              fill=TEXT_COLOR, font=_font(21, bold=True), anchor="mb")
+
+    # Fast zlib level; the image goes straight into a base64 payload
+    buffer = io.BytesIO()
+    img.save(buffer, "PNG", optimize=False, compress_level=1)
+    return buffer.getvalue()
@@ -0,0 +1,223 @@
+"""
+LLM Response Cache for Prompt2Insight
+Two-tier (exact + semantic) in-memory cache for Gemini responses
+"""
+
+import hashlib
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, List, Optional, Tuple
+
+import numpy as np
+import orjson
+import google.generativeai as genai
+
+logger = logging.getLogger(__name__)
+
+# Defaults shared with the Amazon prompt parser's cache
+DEFAULT_CACHE_SIZE = 1000
+SEMANTIC_MATCH_THRESHOLD = 0.92
+EMBEDDING_MODEL = "models/text-embedding-004"
+
+# Embeddings barely separate "laptop under 40000" from "laptop under 80000", or Dell
+# from HP, so amounts and brand names must also agree before a semantic hit is reused
+_AMOUNT_RE = re.compile(r"(\d+(?:,\d+)*(?:\.\d+)?)(?:\s*(k|lakhs?|lacs?)\b)?")
+_AMOUNT_MULTIPLIERS = {"k": 1_000, "lakh": 100_000, "lakhs": 100_000, "lac": 100_000, "lacs": 100_000}
+_WORD_RE = re.compile(r"[^\W\d_]+")
+_BRAND_NAMES = frozenset({
+    "apple", "iphone", "ipad", "macbook", "airpods", "samsung", "galaxy", "oneplus", "nord",
+    "xiaomi", "redmi", "poco", "realme", "vivo", "iqoo", "oppo", "motorola", "moto", "nokia",
+    "google", "pixel", "nothing", "hp", "dell", "lenovo", "thinkpad", "asus", "rog", "acer",
+    "msi", "microsoft", "surface", "sony", "lg", "boat", "jbl", "bose", "sennheiser", "noise"
+})
+
+def query_signature(normalized_query: str) -> str:
+    """
+    Summarize the amounts and brand names in a normalized query
+
+    Amounts are expanded so "40k", "40,000" and "40000" agree.
+
+    Args:
+        normalized_query: Lowercased, whitespace-collapsed query
+
+    Returns:
+        "amounts|brands", each sorted, for comparing two queries
+    """
+    amounts = set()
+    for match in _AMOUNT_RE.finditer(normalized_query):
+        value = float(match.group(1).replace(",", "")) * _AMOUNT_MULTIPLIERS.get(match.group(2), 1)
+        amounts.add(str(int(value)) if value.is_integer() else str(value))
+    brands = _BRAND_NAMES.intersection(_WORD_RE.findall(normalized_query))
+    return " ".join(sorted(amounts)) + "|" + " ".join(sorted(brands))
+
+class LLMCache:
+    """
+    LRU cache of LLM responses, looked up first by an exact hash of the normalized
+    query and then by cosine similarity of query embeddings.
+
+    Entries are grouped by scope (e.g. a RAG collection name and persona); semantic
+    matches are only returned from the same scope, and only for queries with the
+    same amounts and brand names (see query_signature).
+    """
+
+    def __init__(self, name: str, prompt_version: str, max_size: int = DEFAULT_CACHE_SIZE,
+                 threshold: float = SEMANTIC_MATCH_THRESHOLD, semantic: bool = True,
+                 ttl: Optional[float] = None):
+        """
+        Args:
+            name: Cache name used in log messages
+            prompt_version: Bump whenever the prompt changes so stale responses stop matching
+            max_size: Maximum number of cached responses
+            threshold: Minimum cosine similarity for a semantic hit
+            semantic: Set False for responses that copy text out of the query, which a
+                similar query must not reuse; only exact matches are then returned
+            ttl: Seconds a response stays valid, or None to keep it until evicted
+        """
+        self.name = name
+        self.prompt_version = prompt_version
+        self.max_size = max_size
+        self.threshold = threshold
+        self.semantic = semantic
+        self.ttl = ttl
+        # exact key -> (scope, unit embedding or None, orjson-encoded value, query signature or None,
+        # time.monotonic() when stored), in LRU order
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        # Stacked embeddings of cached queries, rebuilt lazily after the cache changes
+        self._embedding_matrix: Optional[np.ndarray] = None
+        self._embedding_keys: List[str] = []
+        self._embedding_scopes: Optional[np.ndarray] = None
+        self._embedding_signatures: Optional[np.ndarray] = None
+        self._embedding_stored_at: Optional[np.ndarray] = None
+        # Callers run in worker threads, so reads and writes are serialized
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _normalize(query: str) -> str:
+        """Lowercase and collapse whitespace so trivially different queries share a key"""
+        return " ".join(query.lower().split())
+
+    def _exact_key(self, normalized_query: str, scope: str) -> str:
+        payload = orjson.dumps({"q": normalized_query, "s": scope, "v": self.prompt_version},
+                               option=orjson.OPT_SORT_KEYS)
+        return hashlib.sha256(payload).hexdigest()
+
+    def _expired(self, stored_at: float) -> bool:
+        return self.ttl is not None and time.monotonic() - stored_at >= self.ttl
+
+    def _embed(self, normalized_query: str) -> Optional[np.ndarray]:
+        """Embed a normalized query as a unit vector, or return None if embedding fails"""
+        try:
+            result = genai.embed_content(model=EMBEDDING_MODEL, content=normalized_query)
+            embedding = np.asarray(result["embedding"], dtype=np.float32)
+            norm = np.linalg.norm(embedding)
+            return embedding / norm if norm else None
+        except Exception as e:
+            logger.warning(f"{self.name} cache: query embedding failed, skipping semantic lookup: {e}")
+            return None
+
+    def lookup(self, query: str, scope: str = "") -> Tuple[Optional[Any], str, Optional[np.ndarray]]:
+        """
+        Look up a cached response for a query
+
+        Args:
+            query: The user query the response was generated for
+            scope: Only entries stored under the same scope can match
+
+        Returns:
+            Tuple of (cached value or None, exact key, query embedding). Pass the key and
+            embedding to store() on a miss so the query is not hashed or embedded twice.
+        """
+        normalized = self._normalize(query)
+        key = self._exact_key(normalized, scope)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._expired(entry[4]):
+                del self._entries[key]
+                self._embedding_matrix = None
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                logger.info(f"⚡ {self.name} cache hit (exact) for '{query}'")
+                return orjson.loads(entry[2]), key, entry[1]
+
+        if not self.semantic:
+            return None, key, None
+
+        # Embed outside the lock; it is a network call
+        embedding = self._embed(normalized)
+        if embedding is None:
+            return None, key, None
+
+        with self._lock:
+            value = self._find_similar(embedding, scope, query_signature(normalized))
+        if value is not None:
+            logger.info(f"⚡ {self.name} cache hit (semantic) for '{query}'")
+            return orjson.loads(value), key, embedding
+        return None, key, embedding
+
+    def _find_similar(self, embedding: np.ndarray, scope: str, signature: str) -> Optional[bytes]:
+        """Return the encoded value of the most similar entry in scope with the same signature (call with the lock held)"""
+        if self._embedding_matrix is None:
+            # Entries stored without their query have no signature and only match exactly
+            self._embedding_keys = [key for key, entry in self._entries.items()
+                                    if entry[1] is not None and entry[3] is not None]
+            if not self._embedding_keys:
+                return None
+            self._embedding_matrix = np.vstack([self._entries[key][1] for key in self._embedding_keys])
+            self._embedding_scopes = np.array([self._entries[key][0] for key in self._embedding_keys], dtype=object)
+            self._embedding_signatures = np.array([self._entries[key][3] for key in self._embedding_keys], dtype=object)
+            self._embedding_stored_at = np.array([self._entries[key][4] for key in self._embedding_keys])
+
+        # Rows are unit vectors, so the dot product is the cosine similarity
+        similarities = self._embedding_matrix @ embedding
+        mismatched = (self._embedding_scopes != scope) | (self._embedding_signatures != signature)
+        if self.ttl is not None:
+            # Expired entries are skipped here and dropped on their next exact lookup or by LRU eviction
+            mismatched |= time.monotonic() - self._embedding_stored_at >= self.ttl
+        similarities[mismatched] = -1.0
+        best = int(np.argmax(similarities))
+        if similarities[best] < self.threshold:
+            return None
+
+        key = self._embedding_keys[best]
+        self._entries.move_to_end(key)
+        return self._entries[key][2]
+
+    def store(self, key: str, embedding: Optional[np.ndarray], value: Any, scope: str = "",
+              query: Optional[str] = None):
+        """
+        Cache a response under the key returned by lookup(), evicting the LRU entry when full
+
+        Args:
+            key: Exact key returned by lookup()
+            embedding: Query embedding returned by lookup()
+            value: JSON-serializable response
+            scope: Scope the response belongs to
+            query: The query passed to lookup(); without it the entry only matches exactly
+        """
+        try:
+            encoded = orjson.dumps(value)
+        except TypeError as e:
+            logger.warning(f"{self.name} cache: response is not JSON-serializable, not caching: {e}")
+            return
+
+        signature = query_signature(self._normalize(query)) if query is not None else None
+        with self._lock:
+            self._entries[key] = (scope, embedding, encoded, signature, time.monotonic())
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+            self._embedding_matrix = None
+
+    def invalidate(self, scope: str):
+        """Drop every cached response stored under a scope"""
+        with self._lock:
+            stale = [key for key, entry in self._entries.items() if entry[0] == scope]
+            for key in stale:
+                del self._entries[key]
+            if stale:
+                self._embedding_matrix = None
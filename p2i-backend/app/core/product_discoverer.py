@@ -1,94 +1,143 @@
 """
 AI Product Discoverer Module for Prompt2Insight
-Uses Gemini 2.5 Flash API with Tool Use to discover products in structured format
+Uses Gemini 2.5 Flash API with JSON mode to discover products in structured format
 """
 
 import os
-import json
+import orjson
 import logging
+from functools import lru_cache
 from typing import List, Dict, Any
 import google.generativeai as genai
-from google.generativeai.types import FunctionDeclaration, Tool
+from google.api_core.exceptions import DeadlineExceeded, ResourceExhausted, ServiceUnavailable
+from google.protobuf.internal import api_implementation
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential_jitter
+from app.core.llm_cache import LLMCache
 
 logger = logging.getLogger(__name__)
 
+# Gemini responses are decoded from protobuf; protobuf>=4.21 does this with the
+# native upb backend, while the pure-Python fallback is many times slower
+if api_implementation.Type() == "python":
+    logger.warning("⚠️ protobuf is using the pure-Python backend; expect slow response decoding")
+
+# Bump when the discovery prompt or response schema changes so cached results are not reused
+PROMPT_VERSION = "3"
+
+# System instruction for the discovery model. Keeping it static and out of the
+# request content leaves only the user query varying per call, so the prefix is
+# eligible for Gemini's implicit prompt caching.
+DISCOVERY_INSTRUCTION = """You are an expert data extraction agent for the Indian market. Find products matching the user's query and return them as JSON matching the response schema.
+
+- Find a maximum of 5 products.
+- price_display: the price as shown, e.g. "₹58,990".
+- price_value: a single number without currency symbols or commas; for a range such as "₹55,000 - ₹60,000" use the lower number (55000).
+- specs: ram_gb (e.g. 8, 16, 32), storage_gb (e.g. 256, 512, 1024) and battery_mah (e.g. 3000, 4500, 5000) as numbers; use 0 when not available.
+- purchase_url: only the site name where the product is typically available (e.g. "Flipkart", "Amazon.in", "Croma", "Reliance Digital").
+
+Return accurate, current product information with complete numerical specifications."""
+
+# Per-request content sent after the system instruction
+QUERY_PROMPT_TEMPLATE = 'User Query: "{query}"'
+
+# Default Gemini request timeout in seconds. The SDK doesn't expose Flex/Priority
+# service tiers, so the timeout is the only per-call latency control; it changes
+# neither cost nor scheduling priority.
+DEFAULT_TIMEOUT = 60
+
+# Transient Gemini errors (503, 429, RPC deadline) are retried with jittered
+# exponential backoff; anything else fails the call immediately
+_retry_transient = retry(
+    wait=wait_exponential_jitter(initial=1, max=10),
+    stop=stop_after_attempt(3),
+    retry=retry_if_exception_type((ServiceUnavailable, ResourceExhausted, DeadlineExceeded)),
+    reraise=True
+)
+
+# Response schema enforced through Gemini's JSON mode
+PRODUCTS_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "products": {
+            "type": "ARRAY",
+            "items": {
+                "type": "OBJECT",
+                "properties": {
+                    "name": {
+                        "type": "STRING",
+                        "description": "Product name"
+                    },
+                    "price_value": {
+                        "type": "NUMBER",
+                        "description": "Numeric price value for sorting (single number, no commas)"
+                    },
+                    "price_display": {
+                        "type": "STRING",
+                        "description": "Price as displayed (e.g., '₹55,000 - ₹60,000')"
+                    },
+                    "specs": {
+                        "type": "OBJECT",
+                        "description": "Numerical specifications for charts",
+                        "properties": {
+                            "ram_gb": {
+                                "type": "NUMBER",
+                                "description": "RAM in GB (use 0 if not available)"
+                            },
+                            "storage_gb": {
+                                "type": "NUMBER", 
+                                "description": "Storage in GB (use 0 if not available)"
+                            },
+                            "battery_mah": {
+                                "type": "NUMBER",
+                                "description": "Battery capacity in mAh (use 0 if not available)"
+                            }
+                        },
+                        "required": ["ram_gb", "storage_gb", "battery_mah"]
+                    },
+                    "purchase_url": {
+                        "type": "STRING",
+                        "description": "Site name where product is available (e.g., 'Flipkart', 'Amazon.in', 'Croma', 'Reliance Digital')"
+                    }
+                },
+                "required": ["name", "price_value", "price_display", "specs", "purchase_url"]
+            }
+        }
+    },
+    "required": ["products"]
+}
+
+# Required fields of each product and its specs, read from the schema once so the
+# response check below stays in sync with what the model is asked to return
+_PRODUCT_SCHEMA = PRODUCTS_SCHEMA["properties"]["products"]["items"]
+_PRODUCT_FIELDS = frozenset(_PRODUCT_SCHEMA["required"])
+_SPEC_FIELDS = tuple(_PRODUCT_SCHEMA["properties"]["specs"]["required"])
+
 class AIProductDiscoverer:
     def __init__(self):
         """Initialize the AI Product Discoverer with Gemini API"""
+        self._cache = LLMCache("Product discovery", PROMPT_VERSION)
         self.api_key = os.getenv("GEMINI_API_KEY")
         if not self.api_key:
             logger.warning("GEMINI_API_KEY not found in environment variables")
             return
         
         genai.configure(api_key=self.api_key)
-        self.model = genai.GenerativeModel('gemini-2.0-flash-exp')
-        
-        # Define the tool schema for structured product extraction
-        self.extract_products_tool = Tool(
-            function_declarations=[
-                FunctionDeclaration(
-                    name="extract_products",
-                    description="Extract structured product information from research",
-                    parameters={
-                        "type": "object",
-                        "properties": {
-                            "products": {
-                                "type": "array",
-                                "items": {
-                                    "type": "object",
-                                    "properties": {
-                                        "name": {
-                                            "type": "string",
-                                            "description": "Product name"
-                                        },
-                                        "price_value": {
-                                            "type": "number",
-                                            "description": "Numeric price value for sorting (single number, no commas)"
-                                        },
-                                        "price_display": {
-                                            "type": "string",
-                                            "description": "Price as displayed (e.g., '₹55,000 - ₹60,000')"
-                                        },
-                                        "specs": {
-                                            "type": "object",
-                                            "description": "Numerical specifications for charts",
-                                            "properties": {
-                                                "ram_gb": {
-                                                    "type": "number",
-                                                    "description": "RAM in GB (use 0 if not available)"
-                                                },
-                                                "storage_gb": {
-                                                    "type": "number", 
-                                                    "description": "Storage in GB (use 0 if not available)"
-                                                },
-                                                "battery_mah": {
-                                                    "type": "number",
-                                                    "description": "Battery capacity in mAh (use 0 if not available)"
-                                                }
-                                            },
-                                            "required": ["ram_gb", "storage_gb", "battery_mah"]
-                                        },
-                                        "purchase_url": {
-                                            "type": "string",
-                                            "description": "Site name where product is available (e.g., 'Flipkart', 'Amazon.in', 'Croma', 'Reliance Digital')"
-                                        }
-                                    },
-                                    "required": ["name", "price_value", "price_display", "specs", "purchase_url"]
-                                }
-                            }
-                        },
-                        "required": ["products"]
-                    }
-                )
-            ]
+        self.model = genai.GenerativeModel(
+            'gemini-2.0-flash-exp',
+            system_instruction=DISCOVERY_INSTRUCTION,
+            generation_config={
+                "response_mime_type": "application/json",
+                "response_schema": PRODUCTS_SCHEMA
+            }
         )
 
-    def find_products_with_ai(self, query: str) -> List[Dict[str, Any]]:
+    def find_products_with_ai(self, query: str, timeout: float = DEFAULT_TIMEOUT) -> List[Dict[str, Any]]:
         """
         Find products using AI with structured output
         
         Args:
             query: User's product search query
+            timeout: Gemini request timeout in seconds
             
         Returns:
             List of structured product dictionaries
@@ -97,119 +146,105 @@ class AIProductDiscoverer:
             logger.error("Gemini API key not configured")
             return []
         
-        try:
-            # Construct the detailed prompt for product discovery
-            prompt = f"""
-You are an expert data extraction agent for the Indian market. Your task is to find products matching the user's query and return them as a structured list using the 'extract_products' tool.
-
-User Query: "{query}"
-
-**CRITICAL INSTRUCTIONS for Data Extraction:**
-- Find a maximum of 5 products.
-- For each product, you MUST extract its key specifications and place them in the 'specs' object. The values for 'ram_gb', 'storage_gb', and 'battery_mah' must be numbers. If a spec is not mentioned, use a value of 0.
-- **Price Extraction Rules:**
-    - You MUST extract a `price_display` string (e.g., "₹58,990").
-    - You MUST also extract a `price_value` which is a single integer or float, removing all currency symbols and commas.
-    - If the price is a range (e.g., "₹55,000 - ₹60,000"), use the **lower number** for `price_value` (55000).
-
-- **Specifications Extraction Rules:**
-    - `ram_gb`: Extract RAM in GB as a number (e.g., 8, 16, 32). Use 0 if not available.
-    - `storage_gb`: Extract storage in GB as a number (e.g., 256, 512, 1024). Use 0 if not available.
-    - `battery_mah`: Extract battery capacity in mAh as a number (e.g., 3000, 4500, 5000). Use 0 if not available.
+        cached_products, cache_key, query_embedding = self._cache.lookup(query)
+        if cached_products is not None:
+            return cached_products
+        
+        products = self._discover_products(query, timeout)
+        if products:
+            self._cache.store(cache_key, query_embedding, products, query=query)
+        return products
 
-- **Site Information**: For `purchase_url`, provide only the site name where the product is typically available (e.g., "Flipkart", "Amazon.in", "Croma", "Reliance Digital").
+    def _build_prompt(self, query: str) -> str:
+        """Construct the per-request prompt; the static instructions are the system instruction"""
+        return QUERY_PROMPT_TEMPLATE.format(query=query)
 
-Please research and use the extract_products tool to return accurate, current product information with complete numerical specifications.
-"""
+    @_retry_transient
+    def _generate(self, query: str, timeout: float):
+        """Call Gemini for a query, retrying transient failures"""
+        return self.model.generate_content(
+            self._build_prompt(query),
+            request_options={"timeout": timeout}
+        )
 
+    def _discover_products(self, query: str, timeout: float = DEFAULT_TIMEOUT) -> List[Dict[str, Any]]:
+        """Run the Gemini JSON-mode call for a query and return the extracted products"""
+        try:
             logger.info(f"Discovering products for query: {query}")
             
-            # Generate content with tool use
-            response = self.model.generate_content(
-                prompt,
-                tools=[self.extract_products_tool],
-                tool_config={'function_calling_config': 'ANY'}
-            )
-            
-            # Parse the tool response
-            if response.candidates and response.candidates[0].content.parts:
-                for part in response.candidates[0].content.parts:
-                    if hasattr(part, 'function_call') and part.function_call:
-                        function_call = part.function_call
-                        if function_call.name == "extract_products":
-                            # Extract the products from the function call arguments
-                            # Convert protobuf MapComposite to regular dict to avoid serialization issues
-                            try:
-                                import json
-                                # First, convert the args to a dict recursively
-                                def convert_protobuf_to_dict(obj):
-                                    """Recursively convert protobuf objects to Python dictionaries"""
-                                    if hasattr(obj, '__iter__') and not isinstance(obj, (str, bytes)):
-                                        if hasattr(obj, 'items'):  # dict-like object
-                                            return {str(k): convert_protobuf_to_dict(v) for k, v in obj.items()}
-                                        else:  # list-like object
-                                            return [convert_protobuf_to_dict(item) for item in obj]
-                                    else:
-                                        return obj
-                                
-                                # Convert the protobuf args to clean Python objects
-                                clean_args = convert_protobuf_to_dict(function_call.args)
-                                products = clean_args.get("products", [])
-                                
-                                # Ensure products is a list of proper dictionaries
-                                if isinstance(products, list):
-                                    clean_products = []
-                                    for product in products:
-                                        if isinstance(product, dict):
-                                            clean_products.append(product)
-                                        else:
-                                            # Convert any remaining protobuf objects
-                                            clean_products.append(convert_protobuf_to_dict(product))
-                                    
-                                    logger.info(f"AI Product Discoverer found {len(clean_products)} products")
-                                    return clean_products
-                                else:
-                                    logger.warning(f"Products data is not a list: {type(products)}")
-                                    return []
-                                    
-                            except Exception as conversion_error:
-                                logger.warning(f"Error converting protobuf response: {conversion_error}")
-                                # Fallback: try manual extraction
-                                try:
-                                    products = []
-                                    raw_products = function_call.args.get("products", [])
-                                    for item in raw_products:
-                                        # Convert each product manually
-                                        product_dict = {}
-                                        if hasattr(item, 'items'):
-                                            for key, value in item.items():
-                                                product_dict[str(key)] = value
-                                        products.append(product_dict)
-                                    
-                                    logger.info(f"AI Product Discoverer found {len(products)} products (manual conversion)")
-                                    return products
-                                except Exception as fallback_error:
-                                    logger.error(f"Manual conversion also failed: {fallback_error}")
-                                    return []
-            
-            logger.warning("No structured products returned from AI")
-            return []
+            response = self._generate(query, timeout)
+            return self._read_products(response)
             
         except Exception as e:
             logger.error(f"Error in AI Product Discoverer: {e}")
             return []
 
-# Global instance
-ai_product_discoverer = AIProductDiscoverer()
+    def _read_products(self, response) -> List[Dict[str, Any]]:
+        """Extract the product list from a JSON-mode response"""
+        try:
+            data = orjson.loads(response.text)
+        except (ValueError, orjson.JSONDecodeError) as e:
+            logger.warning(f"No structured products returned from AI: {e}")
+            return []
+        
+        products = parse_products(data)
+        logger.info(f"AI Product Discoverer found {len(products)} products")
+        return products
+
+def parse_products(data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Read the decoded JSON response into normalized products
+    
+    Reads the known schema fields directly. Products missing a required schema
+    field, or with non-numeric prices or specs, are skipped.
+    
+    Args:
+        data: Decoded response body matching PRODUCTS_SCHEMA
+        
+    Returns:
+        List of structured product dictionaries
+    """
+    products = []
+    for product in data.get("products", ()):
+        missing = _PRODUCT_FIELDS.difference(product.keys())
+        if not missing:
+            specs = product["specs"]
+            missing = {f"specs.{field}" for field in _SPEC_FIELDS if field not in specs}
+        if missing:
+            logger.warning(f"Skipping product missing {sorted(missing)} from the response")
+            continue
+        
+        try:
+            products.append({
+                "name": str(product["name"]),
+                "price_value": float(product["price_value"]),
+                "price_display": str(product["price_display"]),
+                "specs": {field: float(specs[field]) for field in _SPEC_FIELDS},
+                "purchase_url": str(product["purchase_url"])
+            })
+        except (TypeError, ValueError) as e:
+            logger.warning(f"Skipping product with a non-numeric price or spec from the response: {e}")
+    return products
+
+@lru_cache(maxsize=1)
+def get_product_discoverer() -> AIProductDiscoverer:
+    """
+    Return the shared AIProductDiscoverer, creating it on first use.
+    
+    Gemini configuration and model creation happen once per process, and not
+    at import time.
+    """
+    return AIProductDiscoverer()
 
-def find_products_with_ai(query: str) -> List[Dict[str, Any]]:
+def find_products_with_ai(query: str, timeout: float = DEFAULT_TIMEOUT) -> List[Dict[str, Any]]:
     """
     Convenience function to find products using AI
     
     Args:
         query: User's product search query
+        timeout: Gemini request timeout in seconds
         
     Returns:
         List of structured product dictionaries
     """
-    return ai_product_discoverer.find_products_with_ai(query)
+    return get_product_discoverer().find_products_with_ai(query, timeout)
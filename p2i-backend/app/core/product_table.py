@@ -0,0 +1,71 @@
+"""
+Columnar Product Table for Prompt2Insight
+Converts discovered product dictionaries into per-field numpy arrays for the chart generators
+"""
+
+from typing import Any, Dict, List, TypedDict
+
+import numpy as np
+
+class ProductTable(TypedDict):
+    """Product data stored column-wise, one array element per product."""
+    name: np.ndarray           # object array of str
+    price_value: np.ndarray    # float64, 0 where the price is missing or invalid
+    price_display: np.ndarray  # object array of str, None where not provided or the price is invalid
+    ram_gb: np.ndarray         # float64, 0 where missing
+    storage_gb: np.ndarray     # float64, 0 where missing
+    battery_mah: np.ndarray    # float64, 0 where missing
+
+def _number(value: Any) -> float:
+    """Return value as a float if it is a real number, else 0."""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    return 0.0
+
+def build_product_table(products: List[Dict[str, Any]]) -> ProductTable:
+    """
+    Build a ProductTable from product dictionaries in a single pass
+
+    Args:
+        products: List of product dictionaries with name, price_value, price_display and specs
+
+    Returns:
+        ProductTable with one entry per product, in input order
+    """
+    count = len(products)
+    table: ProductTable = {
+        "name": np.empty(count, dtype=object),
+        "price_value": np.zeros(count),
+        "price_display": np.empty(count, dtype=object),
+        "ram_gb": np.zeros(count),
+        "storage_gb": np.zeros(count),
+        "battery_mah": np.zeros(count)
+    }
+
+    for i, product in enumerate(products):
+        table["name"][i] = product.get("name", "Unknown")
+
+        price = product.get("price_value")
+        if _number(price) > 0:
+            table["price_value"][i] = price
+            table["price_display"][i] = product.get("price_display")
+
+        specs = product.get("specs") or {}
+        table["ram_gb"][i] = _number(specs.get("ram_gb", 0))
+        table["storage_gb"][i] = _number(specs.get("storage_gb", 0))
+        table["battery_mah"][i] = _number(specs.get("battery_mah", 0))
+
+    return table
+
+def price_order(table: ProductTable) -> np.ndarray:
+    """
+    Indices of the products with a valid price, cheapest first
+
+    Args:
+        table: ProductTable to order
+
+    Returns:
+        int array of row indices; ties keep their input order
+    """
+    priced = np.flatnonzero(table["price_value"] > 0)
+    return priced[np.argsort(table["price_value"][priced], kind="stable")]
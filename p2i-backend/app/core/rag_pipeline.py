@@ -1,18 +1,81 @@
+import logging
 import os
 import re
+import threading
 import time
-from typing import Optional, Dict, Any
+import weakref
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional, Dict, Any, Iterator, List, Set
 from dotenv import load_dotenv
+import orjson
 
 # Import framework-specific components
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.prompts import PromptTemplate
-from langchain_core.runnables import RunnableParallel, RunnablePassthrough
 from langchain_google_genai import ChatGoogleGenerativeAI
 
 # Import local application services
-from app.services.data_scraper import DataScraper
-from app.services.vector_store import VectorStoreService
+from app.services.data_scraper import get_data_scraper
+from app.services.vector_store import get_vector_service
+from app.core.llm_cache import LLMCache
+
+# Load environment variables once at import instead of on every query
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Bump when the RAG prompt template or personas change so cached answers are not reused
+PROMPT_VERSION = "2"
+
+# Final answers keyed by (collection, persona) and question; hits skip retrieval and the LLM.
+# Answers expire after an hour (seconds) so they follow newly scraped reviews
+ANSWER_CACHE_TTL = 3600
+_answer_cache = LLMCache("RAG answer", PROMPT_VERSION, ttl=ANSWER_CACHE_TTL)
+
+# Default LLM client limits for RAG answers (seconds, retries). The Gemini SDK
+# doesn't expose Flex/Priority service tiers, so these plain client settings are
+# the only latency control; they change neither cost nor scheduling priority.
+DEFAULT_LLM_TIMEOUT = 60
+DEFAULT_LLM_MAX_RETRIES = 2
+
+# Article and YouTube scraping for a new collection run concurrently; each source
+# gets its own time limit (seconds) so a slow one can't stall the whole query
+DOCUMENTS_TIMEOUT = 90
+YOUTUBE_TIMEOUT = 30
+
+# On-disk cache of scraped documents per collection, so rebuilding a collection (e.g. after
+# ChromaDB is reset) doesn't scrape again; set the directory to "" to disable.
+# Defaults to cache_store/ in the backend directory, next to chroma_db_store/
+SCRAPED_DOCS_CACHE_DIR = os.getenv(
+    "P2I_SCRAPED_DOCS_CACHE_DIR",
+    str(Path(__file__).parent.parent.parent / "cache_store" / "scraped_docs")
+)
+SCRAPED_DOCS_TTL = 24 * 3600  # seconds
+
+# Retrievers kept open, one per collection
+RETRIEVER_CACHE_SIZE = 128
+
+# Names of collections known to exist in ChromaDB, loaded on first use
+_known_collections: Optional[Set[str]] = None
+_collections_lock = threading.Lock()
+
+# Per-collection build locks; weak values, so a lock goes away once no build holds it
+_build_locks: "weakref.WeakValueDictionary[str, threading.Lock]" = weakref.WeakValueDictionary()
+_build_locks_guard = threading.Lock()
+
+# Simpler prompt used when the RAG chain returns an empty answer
+FALLBACK_PROMPT_TEMPLATE = """Based on this information about gaming laptops:
+            
+{context}
+
+Question: {question}
+
+Provide a helpful answer in 2-3 sentences:"""
+
+# Characters not allowed in a ChromaDB collection name (applied after lowercasing)
+_INVALID_COLLECTION_CHARS = re.compile(r'[^a-z0-9_-]')
 
 # Define persona-specific prompt engineering templates
 PERSONA_PROMPTS = {
@@ -65,34 +128,35 @@ Your role: Help general consumers make informed decisions with balanced, practic
     }
 }
 
+# Generation token limit per persona, about 1.5 tokens per word of the word limit
+# given in the persona's system prompt (300 / 400 / 350 words)
+PERSONA_MAX_OUTPUT_TOKENS = {
+    "budget_student": 450,
+    "power_user": 600,
+    "general": 525
+}
+
 def _post_process_response(response: str, persona: str, max_words: int = 350) -> str:
     """
     Post-process the RAG response to ensure it's well-formatted and appropriately sized.
     """
-    # Remove excessive whitespace and normalize line breaks
-    response = ' '.join(response.split())
-    
-    # If response is too long, truncate intelligently
+    # Split once: the words both normalize whitespace and give the length check
     words = response.split()
     
-    if len(words) > max_words:
-        # Try to end at a sentence boundary near the limit
-        truncated = ' '.join(words[:max_words])
-        
-        # Find the last sentence ending
-        last_period = truncated.rfind('.')
-        last_exclamation = truncated.rfind('!')
-        last_question = truncated.rfind('?')
-        
-        sentence_end = max(last_period, last_exclamation, last_question)
-        
-        if sentence_end > len(truncated) * 0.8:  # If we can trim to a sentence ending
-            response = truncated[:sentence_end + 1]
-        else:
-            response = truncated + "..."
+    if len(words) <= max_words:
+        return ' '.join(words)
     
-    return response.strip()
+    # If response is too long, try to end at a sentence boundary near the limit
+    truncated = ' '.join(words[:max_words])
+    
+    # Find the last sentence ending
+    sentence_end = max(truncated.rfind('.'), truncated.rfind('!'), truncated.rfind('?'))
+    
+    if sentence_end > len(truncated) * 0.8:  # If we can trim to a sentence ending
+        return truncated[:sentence_end + 1]
+    return truncated + "..."
 
+@lru_cache(maxsize=512)
 def _sanitize_collection_name(name: str) -> str:
     """
     Sanitizes a string to be a valid ChromaDB collection name.
@@ -102,7 +166,7 @@ def _sanitize_collection_name(name: str) -> str:
     - Ensures name starts and ends with alphanumeric characters.
     """
     name = name.lower().replace(' ', '_')
-    name = re.sub(r'[^a-z0-9_-]', '', name)
+    name = _INVALID_COLLECTION_CHARS.sub('', name)
     # Remove leading/trailing underscores and hyphens
     name = name.strip('_-')
     # Ensure the name starts with alphanumeric if it doesn't
@@ -117,80 +181,214 @@ def _sanitize_collection_name(name: str) -> str:
     # Ensure the name is between 3 and 63 characters
     return name[:63]
 
-def run_rag_query(product_name: str, question: str, persona: Optional[str] = None) -> Dict[str, Any]:
+def _scrape_result(future, deadline: float, timeout: float, source: str) -> List[str]:
     """
-    Executes a full RAG pipeline for a given product and question with persona-based analysis.
+    Wait for a scrape future until its deadline, returning no documents if it fails or times out.
+    """
+    try:
+        return future.result(timeout=max(0.0, deadline - time.monotonic()))
+    except FutureTimeoutError:
+        future.cancel()
+        logger.warning(f"⚠️ {source} scraping timed out after {timeout}s, continuing without it")
+    except Exception as e:
+        logger.warning(f"⚠️ {source} scraping failed: {e}")
+    return []
 
-    This function will:
-    1. Scrape data for the product if it's not already in the vector store.
-    2. Build a vector store for the product.
-    3. Use a RAG chain with persona-specific prompting to answer the question.
+def _scraped_docs_path(collection_name: str) -> str:
+    """
+    Path of a collection's scraped documents in the disk cache.
+    """
+    return os.path.join(SCRAPED_DOCS_CACHE_DIR, f"{collection_name}.json")
 
-    Args:
-        product_name: The name of the product to query.
-        question: The user's question about the product.
-        persona: Optional persona type ('budget_student', 'power_user', 'general', or None)
+def _load_scraped_documents(collection_name: str) -> Optional[List[str]]:
+    """
+    Read a collection's scraped documents from the disk cache if they are younger than SCRAPED_DOCS_TTL.
+    """
+    if not SCRAPED_DOCS_CACHE_DIR:
+        return None
+    path = _scraped_docs_path(collection_name)
+    try:
+        if time.time() - os.path.getmtime(path) > SCRAPED_DOCS_TTL:
+            return None
+        with open(path, "rb") as f:
+            return orjson.loads(f.read())
+    except FileNotFoundError:
+        return None
+    except (OSError, orjson.JSONDecodeError) as e:
+        logger.warning(f"Scraped documents cache read failed for '{collection_name}': {e}")
+        return None
+
+def _save_scraped_documents(collection_name: str, documents: List[str]):
+    """
+    Write a collection's scraped documents to the disk cache.
+    """
+    if not SCRAPED_DOCS_CACHE_DIR:
+        return
+    path = _scraped_docs_path(collection_name)
+    try:
+        os.makedirs(SCRAPED_DOCS_CACHE_DIR, exist_ok=True)
+        # Write to a temp file and rename, so readers never see a partial file
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(orjson.dumps(documents))
+        os.replace(tmp_path, path)
+    except (OSError, TypeError) as e:
+        logger.warning(f"Scraped documents cache write failed for '{collection_name}': {e}")
+
+def _collection_exists(collection_name: str) -> bool:
+    """
+    Check whether a collection exists using the cached set of collection names.
+    """
+    global _known_collections
+    with _collections_lock:
+        if _known_collections is not None and collection_name in _known_collections:
+            return True
+        # Unknown names are re-listed once, since another worker may have built the
+        # collection; a true miss is followed by a full scrape anyway
+        _known_collections = _list_collection_names()
+        return collection_name in _known_collections
+
+def _build_lock(collection_name: str) -> threading.Lock:
+    """
+    Return the lock serializing builds of one collection.
+    """
+    with _build_locks_guard:
+        return _build_locks.setdefault(collection_name, threading.Lock())
 
-    Returns:
-        Dictionary containing:
-        - answer: The AI-generated answer as a string
-        - sources: List of source documents used
-        - execution_time: Time taken to process the query
-        - persona_used: The actual persona applied
+def _ensure_collection(collection_name: str, product_name: str) -> bool:
     """
-    start_time = time.time()
-    load_dotenv()
+    Scrape and index a product's documents unless its collection already exists.
 
-    # Determine which persona to use
-    persona_used = persona if persona in PERSONA_PROMPTS else "general"
-    persona_config = PERSONA_PROMPTS[persona_used]
-    
-    print(f"Using persona: '{persona_used}'")
+    Builds run under a per-collection lock and re-check for the collection once it
+    is held, so concurrent first queries for a product build it only once instead
+    of each adding every document again.
 
-    # 1. Instantiate services
-    data_scraper = DataScraper()
-    vector_service = VectorStoreService()
-    
-    # 2. Define a sanitized collection name for the product
-    collection_name = _sanitize_collection_name(product_name)
-    print(f"Using collection: '{collection_name}'")
+    Returns:
+        False if no documents could be found for the product
+    """
+    if _collection_exists(collection_name):
+        logger.debug(f"Collection '{collection_name}' already exists. Skipping scraping.")
+        return True
+
+    with _build_lock(collection_name):
+        if _collection_exists(collection_name):
+            logger.debug(f"Collection '{collection_name}' was built by another request.")
+            return True
+
+        logger.info(f"Collection '{collection_name}' not found. Building new collection...")
+        data_scraper = get_data_scraper()
+        vector_service = get_vector_service()
+
+        all_documents = _load_scraped_documents(collection_name)
+        if all_documents:
+            logger.debug(f"Using {len(all_documents)} cached scraped documents.")
+        else:
+            # Use the new primary document collection method (RSS + fallback), and
+            # also try to get YouTube transcripts as supplementary content
+            logger.debug("Scraping articles and YouTube reviews...")
+            # A worker per job for this run only: both jobs start on submission, so their
+            # deadlines count from when they run, and a scrape abandoned after its
+            # deadline never holds a worker another request is waiting for
+            scrape_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="rag-scrape")
+            try:
+                started_at = time.monotonic()
+                documents_future = scrape_executor.submit(data_scraper.get_documents, product_name)
+                youtube_future = scrape_executor.submit(data_scraper.scrape_youtube_reviews, product_name)
+                documents = _scrape_result(documents_future, started_at + DOCUMENTS_TIMEOUT, DOCUMENTS_TIMEOUT, "article")
+                youtube_docs = _scrape_result(youtube_future, started_at + YOUTUBE_TIMEOUT, YOUTUBE_TIMEOUT, "YouTube")
+            finally:
+                scrape_executor.shutdown(wait=False, cancel_futures=True)
+            logger.debug(f"Found {len(youtube_docs)} YouTube transcripts.")
+
+            # Combine all documents
+            all_documents = documents + youtube_docs
+            if all_documents:
+                _save_scraped_documents(collection_name, all_documents)
 
-    # 3. Check if the collection exists. If not, create it.
-    try:
-        vector_service.client.get_collection(name=collection_name)
-        print(f"Collection '{collection_name}' already exists. Skipping scraping.")
-    except Exception:
-        print(f"Collection '{collection_name}' not found. Building new collection...")
-        
-        # Use the new primary document collection method (RSS + fallback)
-        documents = data_scraper.get_documents(product_name)
-        
-        # Also try to get YouTube transcripts as supplementary content
-        print("Scraping YouTube reviews...")
-        youtube_docs = data_scraper.scrape_youtube_reviews(product_name)
-        print(f"Found {len(youtube_docs)} YouTube transcripts.")
-        
-        # Combine all documents
-        all_documents = documents + youtube_docs
-        
         if not all_documents:
-            return {
-                "answer": "I'm sorry, but I couldn't find enough information about this product to answer your question.",
-                "sources": [],
-                "execution_time": time.time() - start_time,
-                "persona_used": persona_used
-            }
-            
+            return False
+
         # Build the vector store with the new documents
-        print("Building vector store...")
+        logger.debug("Building vector store...")
         vector_service.build_vector_store(collection_name, all_documents)
-        print("Vector store built successfully.")
+        forget_collection(collection_name, keep_scraped_documents=True)
+        with _collections_lock:
+            if _known_collections is not None:
+                _known_collections.add(collection_name)
+        logger.info("Vector store built successfully.")
+        return True
+
+def _list_collection_names() -> Set[str]:
+    """
+    Return the names of all collections in ChromaDB.
+    """
+    collections = get_vector_service().client.list_collections()
+    # Older chromadb returns Collection objects, newer versions return names
+    return {getattr(c, "name", c) for c in collections}
 
-    # 4. Get the retriever for the product's collection
-    retriever = vector_service.get_retriever(collection_name)
+def warm_up_retrievers() -> int:
+    """
+    Load the collection names and open retrievers for existing collections.
 
-    # 5. Define the persona-specific prompt template with improved formatting
-    persona_instruction = persona_config["system_prompt"]
+    Meant for startup, so the first question about an already-indexed product
+    doesn't pay for listing collections and opening its retriever.
+
+    Returns:
+        Number of retrievers opened
+    """
+    global _known_collections
+    with _collections_lock:
+        _known_collections = _list_collection_names()
+        names = sorted(_known_collections)[:RETRIEVER_CACHE_SIZE]
+    for name in names:
+        _get_retriever(name)
+    return len(names)
+
+@lru_cache(maxsize=RETRIEVER_CACHE_SIZE)
+def _get_retriever(collection_name: str):
+    """
+    Open the retriever for a collection, once per collection name.
+    """
+    return get_vector_service().get_retriever(collection_name)
+
+def _cache_scope(collection_name: str, persona: str) -> str:
+    """
+    Answer cache scope; answers depend on the persona's prompt, so it is part of the scope.
+    """
+    return f"{collection_name}:{persona}"
+
+def forget_collection(collection_name: str, keep_scraped_documents: bool = False):
+    """
+    Drop cached handles after a collection is rebuilt or deleted.
+
+    Args:
+        collection_name: The collection that changed
+        keep_scraped_documents: Keep the scraped documents on disk; set when the
+            collection was just rebuilt from them
+    """
+    with _collections_lock:
+        if _known_collections is not None:
+            _known_collections.discard(collection_name)
+    # A deleted collection is scraped afresh when it is next built
+    if SCRAPED_DOCS_CACHE_DIR and not keep_scraped_documents:
+        try:
+            os.remove(_scraped_docs_path(collection_name))
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"Scraped documents cache delete failed for '{collection_name}': {e}")
+    # Answers from the old documents no longer apply
+    for persona in PERSONA_PROMPTS:
+        _answer_cache.invalidate(_cache_scope(collection_name, persona))
+    # lru_cache can't evict a single key; retrievers are cheap to reopen
+    _get_retriever.cache_clear()
+
+@lru_cache(maxsize=None)
+def _get_prompt(persona: str) -> PromptTemplate:
+    """
+    Build the persona-specific RAG prompt template, once per persona.
+    """
+    persona_instruction = PERSONA_PROMPTS[persona]["system_prompt"]
     
     template = f"""{persona_instruction}
 
@@ -211,65 +409,180 @@ Question: {{question}}
 
 Answer:"""
 
-    prompt = PromptTemplate.from_template(template)
+    return PromptTemplate.from_template(template)
 
-    # 6. Initialize the LLM with appropriate settings for focused responses
-    llm = ChatGoogleGenerativeAI(
+@lru_cache(maxsize=None)
+def _get_llm(timeout: float, max_retries: int, persona: str) -> ChatGoogleGenerativeAI:
+    """
+    Create the RAG LLM client for a set of client limits and a persona, once per combination.
+    """
+    # Appropriate settings for focused responses; the token limit follows the
+    # persona's word limit so generation stops instead of being truncated afterwards
+    return ChatGoogleGenerativeAI(
         model="gemini-1.5-flash",  # Try a different model
         temperature=0.3,
-        max_output_tokens=1000  # Increase token limit
+        max_output_tokens=PERSONA_MAX_OUTPUT_TOKENS[persona],
+        timeout=timeout,
+        max_retries=max_retries
     )
 
-    # 7. Define the RAG chain using LCEL
-    setup_and_retrieval = RunnableParallel(
-        {"context": retriever, "question": RunnablePassthrough()}
-    )
-    rag_chain = setup_and_retrieval | prompt | llm | StrOutputParser()
+def run_rag_query(product_name: str, question: str, persona: Optional[str] = None,
+                  timeout: float = DEFAULT_LLM_TIMEOUT, max_retries: int = DEFAULT_LLM_MAX_RETRIES,
+                  use_cache: bool = True) -> Dict[str, Any]:
+    """
+    Executes a full RAG pipeline for a given product and question with persona-based analysis.
+
+    This function will:
+    1. Scrape data for the product if it's not already in the vector store.
+    2. Build a vector store for the product.
+    3. Use a RAG chain with persona-specific prompting to answer the question.
+
+    Args:
+        product_name: The name of the product to query.
+        question: The user's question about the product.
+        persona: Optional persona type ('budget_student', 'power_user', 'general', or None)
+        timeout: LLM request timeout in seconds
+        max_retries: LLM client retries for failed requests
+        use_cache: Whether a cached answer may be returned; the new answer is cached either way
+
+    Returns:
+        Dictionary containing:
+        - answer: The AI-generated answer as a string
+        - sources: List of source documents used
+        - execution_time: Time taken to process the query
+        - persona_used: The actual persona applied
+        - cached: True when the answer came from the answer cache
+    """
+    result = None
+    for event in run_rag_query_stream(product_name, question, persona, timeout, max_retries, use_cache):
+        if event["event"] == "done":
+            result = event
+    return {key: value for key, value in result.items() if key != "event"}
+
+def run_rag_query_stream(product_name: str, question: str, persona: Optional[str] = None,
+                         timeout: float = DEFAULT_LLM_TIMEOUT, max_retries: int = DEFAULT_LLM_MAX_RETRIES,
+                         use_cache: bool = True) -> Iterator[Dict[str, Any]]:
+    """
+    Streaming variant of run_rag_query that yields the answer as the LLM generates it.
+
+    Args:
+        product_name: The name of the product to query.
+        question: The user's question about the product.
+        persona: Optional persona type ('budget_student', 'power_user', 'general', or None)
+        timeout: LLM request timeout in seconds
+        max_retries: LLM client retries for failed requests
+        use_cache: Whether a cached answer may be returned; the new answer is cached either way
+
+    Yields:
+        {"event": "token", "text": ...} for each chunk of the raw answer, then one
+        {"event": "done", ...} with the same fields run_rag_query returns. The final
+        answer is post-processed, so it can differ in whitespace and length from the
+        concatenated tokens.
+    """
+    start_time = time.time()
+
+    # Determine which persona to use
+    persona_used = persona if persona in PERSONA_PROMPTS else "general"
+    
+    logger.debug(f"Using persona: '{persona_used}'")
+
+    # 1. Define a sanitized collection name for the product
+    collection_name = _sanitize_collection_name(product_name)
+    logger.debug(f"Using collection: '{collection_name}'")
+
+    cache_scope = _cache_scope(collection_name, persona_used)
+    cached_answer, cache_key, question_embedding = _answer_cache.lookup(question, scope=cache_scope)
+    if use_cache and cached_answer is not None:
+        yield {"event": "token", "text": cached_answer["answer"]}
+        yield {
+            "event": "done",
+            **cached_answer,
+            "execution_time": time.time() - start_time,
+            "persona_used": persona_used,
+            "cached": True
+        }
+        return
+
+    # 2-3. Get the shared services and build the collection on first use
+    if not _ensure_collection(collection_name, product_name):
+        answer = "I'm sorry, but I couldn't find enough information about this product to answer your question."
+        yield {"event": "token", "text": answer}
+        yield {
+            "event": "done",
+            "answer": answer,
+            "sources": [],
+            "execution_time": time.time() - start_time,
+            "persona_used": persona_used,
+            "cached": False
+        }
+        return
+
+    # 4. Get the retriever for the product's collection
+    retriever = _get_retriever(collection_name)
+
+    # 5. Get the persona-specific prompt template and 6. the LLM for the limits and persona
+    prompt = _get_prompt(persona_used)
+    llm = _get_llm(timeout, max_retries, persona_used)
+
+    # 7. Define the RAG chain using LCEL; retrieval runs once, up front, so the
+    # same documents feed both the prompt context and the source list
+    rag_chain = prompt | llm | StrOutputParser()
 
-    # 8. Invoke the chain and get the answer
-    print(f"\nInvoking RAG chain with {persona_used} persona...")
+    # 8. Retrieve the context and stream the answer from the chain
+    logger.debug(f"Streaming RAG chain with {persona_used} persona...")
     
+    retrieved_docs = []
+    answer_parts = []
+    answer_failed = False
     try:
-        raw_answer = rag_chain.invoke(question)
+        retrieved_docs = retriever.invoke(question)
+        context_text = "\n\n".join(doc.page_content for doc in retrieved_docs)
+        
+        for chunk in rag_chain.stream({"context": context_text, "question": question}):
+            if chunk:
+                answer_parts.append(chunk)
+                yield {"event": "token", "text": chunk}
         
         # If empty response, try a simpler approach
-        if not str(raw_answer).strip():
-            print("⚠️ Empty response from LLM, trying fallback...")
-            
-            # Get context directly and try a simple question
-            context_docs = retriever.invoke(question)
-            context_text = "\n\n".join([doc.page_content[:500] for doc in context_docs[:2]])
+        if not "".join(answer_parts).strip():
+            logger.warning("⚠️ Empty response from LLM, trying fallback...")
             
-            fallback_prompt = f"""Based on this information about gaming laptops:
-            
-{context_text}
-
-Question: {question}
-
-Provide a helpful answer in 2-3 sentences:"""
+            # Use a shorter context and try a simple question
+            fallback_context = "\n\n".join([doc.page_content[:500] for doc in retrieved_docs[:2]])
             
-            raw_answer = llm.invoke(fallback_prompt)
+            fallback_prompt = FALLBACK_PROMPT_TEMPLATE.format(context=fallback_context, question=question)
+            fallback_answer = llm.invoke(fallback_prompt).content
+            answer_parts = [fallback_answer]
+            yield {"event": "token", "text": fallback_answer}
         
     except Exception as e:
-        print(f"❌ Error invoking LLM: {e}")
-        raw_answer = f"I encountered an error while analyzing this product. Error: {str(e)}"
+        logger.error(f"❌ Error invoking LLM: {e}")
+        error_answer = f"I encountered an error while analyzing this product. Error: {str(e)}"
+        answer_parts = [error_answer]
+        answer_failed = True
+        yield {"event": "token", "text": error_answer}
     
     # Post-process the response for better formatting and length
-    processed_answer = _post_process_response(str(raw_answer), persona_used)
+    processed_answer = _post_process_response("".join(answer_parts), persona_used)
     
-    # 9. Get source documents for transparency
-    source_docs = retriever.invoke(question)  # Use invoke instead of deprecated method
-    sources = [{"source": doc.metadata.get("source", "Unknown"), 
+    # 9. Report the retrieved documents as sources for transparency
+    sources = [{"source": (doc.metadata or {}).get("source", "Unknown"), 
                 "content_preview": doc.page_content[:150] + "..."} 
-               for doc in source_docs[:3]]  # Top 3 sources
+               for doc in retrieved_docs[:3]]  # Top 3 sources
+    
+    if not answer_failed:
+        _answer_cache.store(cache_key, question_embedding,
+                            {"answer": processed_answer, "sources": sources}, scope=cache_scope, query=question)
     
     execution_time = time.time() - start_time
     
-    return {
+    yield {
+        "event": "done",
         "answer": processed_answer,
         "sources": sources,
         "execution_time": execution_time,
-        "persona_used": persona_used
+        "persona_used": persona_used,
+        "cached": False
     }
 
 if __name__ == '__main__':
@@ -4,23 +4,68 @@ The central decision-making brain that classifies user intent and routes to appr
 """
 
 import os
-import json
+import orjson
 import logging
-from typing import Dict, Any
+from typing import Dict, Optional
 import google.generativeai as genai
 
+from app.core.llm_cache import LLMCache
+
 logger = logging.getLogger(__name__)
 
+# Bump when the router prompt changes so cached routing decisions are not reused
+PROMPT_VERSION = "2"
+
+# System instruction for the router model; only the user prompt varies per call
+ROUTER_INSTRUCTION = """You are an expert query router for an e-commerce assistant. Your job is to analyze the user's prompt and determine the correct tool to use.
+
+The available intents are:
+1. `discovery_query`: Use for finding, searching, or discovering products. This includes broad searches, specific product searches, and comparison requests. Examples: "vivo phones", "best gaming laptops under 60000", "show me some smartwatches", "compare iPhone 15 vs Samsung Galaxy S24", "find me Samsung phones under 30000".
+2. `analytical_query`: Use ONLY for deep analysis questions about products that the user already knows exist, "why" questions, or requests for news/reviews. Examples: "why should I buy an iPhone 15", "latest news about the Apple Vision Pro", "detailed review analysis of MacBook Pro M3".
+
+Respond with the intent and the extracted search term as the query."""
+
+ROUTER_PROMPT_TEMPLATE = 'User Prompt: "{user_prompt}"'
+
+# Gemini response schema for the routing decision
+ROUTE_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "intent": {
+            "type": "STRING",
+            "enum": ["discovery_query", "analytical_query"]
+        },
+        "query": {
+            "type": "STRING",
+            "description": "Extracted search term"
+        }
+    },
+    "required": ["intent", "query"]
+}
+
 class MasterRouterAgent:
     def __init__(self):
         """Initialize the Master Router Agent with Gemini API"""
+        # Users repeat the same few phrasings, so routing decisions are cached by
+        # normalized prompt. Exact matches only: the decision carries a search term
+        # extracted from the prompt, which a merely similar prompt must not reuse
+        self._cache = LLMCache("Router", PROMPT_VERSION, semantic=False)
         self.api_key = os.getenv("GEMINI_API_KEY")
         if not self.api_key:
             logger.warning("GEMINI_API_KEY not found in environment variables")
             return
         
         genai.configure(api_key=self.api_key)
-        self.model = genai.GenerativeModel('gemini-2.0-flash-exp')
+        # Two-way intent classification of a short prompt does not need a large model;
+        # the small flash-8b model keeps routing off the critical path
+        self.model = genai.GenerativeModel(
+            'gemini-1.5-flash-8b',
+            system_instruction=ROUTER_INSTRUCTION,
+            generation_config={
+                "response_mime_type": "application/json",
+                "response_schema": ROUTE_SCHEMA
+            }
+        )
 
     def route_query(self, user_prompt: str) -> Dict[str, str]:
         """
@@ -36,76 +81,46 @@ class MasterRouterAgent:
             logger.error("Gemini API key not configured")
             return {"intent": "discovery_query", "query": user_prompt}
         
-        try:
-            # Construct the router prompt for intent classification
-            prompt = f"""
-You are an expert query router for an e-commerce assistant. Your job is to analyze the user's prompt and determine the correct tool to use. 
-
-CRITICAL: You must respond with ONLY a valid JSON object, no additional text, no markdown formatting, no explanation.
-
-The available intents are:
-1. `discovery_query`: Use for finding, searching, or discovering products. This includes broad searches, specific product searches, and comparison requests. Examples: "vivo phones", "best gaming laptops under 60000", "show me some smartwatches", "compare iPhone 15 vs Samsung Galaxy S24", "find me Samsung phones under 30000".
-2. `analytical_query`: Use ONLY for deep analysis questions about products that the user already knows exist, "why" questions, or requests for news/reviews. Examples: "why should I buy an iPhone 15", "latest news about the Apple Vision Pro", "detailed review analysis of MacBook Pro M3".
-
-Based on the user's prompt, respond with this exact JSON structure:
-{{"intent": "discovery_query", "query": "extracted search term"}}
-OR
-{{"intent": "analytical_query", "query": "extracted search term"}}
-
-User Prompt: "{user_prompt}"
-
-JSON Response:"""
+        cached_decision, cache_key, prompt_embedding = self._cache.lookup(user_prompt)
+        if cached_decision is not None:
+            return cached_decision
+        
+        route_decision = self._classify(user_prompt)
+        if route_decision is None:
+            # Fallback to discovery_query on any error; not cached so the next call retries
+            return {"intent": "discovery_query", "query": user_prompt}
+        
+        self._cache.store(cache_key, prompt_embedding, route_decision)
+        return route_decision
 
-            logger.info(f"Routing query: {user_prompt}")
+    def _classify(self, user_prompt: str) -> Optional[Dict[str, str]]:
+        """
+        Ask Gemini for the routing decision
+        
+        Args:
+            user_prompt: The user's raw input query
             
-            # Generate the routing decision
-            response = self.model.generate_content(prompt)
+        Returns:
+            Dictionary with 'intent' and 'query' keys, or None if the call or parsing failed
+        """
+        try:
+            logger.info(f"Routing query: {user_prompt}")
             
-            if response.text:
-                try:
-                    # Clean the response text to extract JSON
-                    response_text = response.text.strip()
-                    
-                    # Try to find JSON in the response
-                    json_start = response_text.find('{')
-                    json_end = response_text.rfind('}') + 1
-                    
-                    if json_start != -1 and json_end > json_start:
-                        json_text = response_text[json_start:json_end]
-                    else:
-                        json_text = response_text
-                    
-                    # Parse the JSON response from the LLM
-                    route_decision = json.loads(json_text)
-                    
-                    # Validate the response structure
-                    if "intent" in route_decision and "query" in route_decision:
-                        intent = route_decision["intent"]
-                        query = route_decision["query"]
-                        
-                        # Validate intent values
-                        if intent not in ["discovery_query", "analytical_query"]:
-                            logger.warning(f"Invalid intent '{intent}', defaulting to discovery_query")
-                            intent = "discovery_query"
-                        
-                        logger.info(f"Routed to: {intent} with query: {query}")
-                        return {"intent": intent, "query": query}
-                    
-                except json.JSONDecodeError as e:
-                    logger.error(f"Failed to parse router response as JSON: {e}")
-                    logger.debug(f"Raw response: {response.text}")
-                except Exception as e:
-                    logger.error(f"Error processing router response: {e}")
-                    logger.debug(f"Raw response: {response.text}")
+            # JSON mode with an enum schema, so the response is always a valid decision
+            response = self.model.generate_content(ROUTER_PROMPT_TEMPLATE.format(user_prompt=user_prompt))
+            route_decision = orjson.loads(response.text)
             
-            # Fallback to discovery_query if parsing fails
-            logger.warning("Router response parsing failed, defaulting to discovery_query")
-            return {"intent": "discovery_query", "query": user_prompt}
+            intent = route_decision["intent"]
+            query = route_decision["query"]
+            logger.info(f"Routed to: {intent} with query: {query}")
+            return {"intent": intent, "query": query}
             
+        except orjson.JSONDecodeError as e:
+            logger.error(f"Failed to parse router response as JSON: {e}")
+            return None
         except Exception as e:
             logger.error(f"Error in Master Router Agent: {e}")
-            # Fallback to discovery_query on any error
-            return {"intent": "discovery_query", "query": user_prompt}
+            return None
 
 # Global instance
 master_router = MasterRouterAgent()
@@ -1,59 +1,78 @@
 import urllib.parse
 import csv
 import requests
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 # This script scrapes Amazon search results for laptops under 50k and saves the data to a CSV file.
 
 # Our token provided by 'scrape.do'
 token = "<token_here>"
 
-current_result_page = 1
 max_result_page = 5  # Set to 5 pages for testing, you can increase this
 
-# Initialize list to store product data
-all_products = []
+# Number of result pages fetched at the same time
+PAGE_WORKERS = 5
+
+# Fallback selectors per field, in priority order; the first selector that matches wins
+NAME_SELECTORS = ("h2 span", "h2 a span", ".a-size-medium")
+PRICE_SELECTORS = ("span.a-price-whole", "span.a-price", ".a-price .a-offscreen")
+
+def _select_first(element, selectors):
+    """
+    Return the match of the first selector that matches, trying them in order.
+    """
+    for selector in selectors:
+        match = element.select_one(selector)
+        if match is not None:
+            return match
+    return None
 
 print("Starting Amazon search results scraper...")
 print(f"Target: Laptops under 50k")
 print(f"Max pages to scrape: {max_result_page}")
 
-# Loop through all result pages
-while True:
-    # break the loop when max page number is reached
-    if current_result_page > max_result_page:
-        break
+# Reuse one keep-alive connection pool for every page instead of a new TLS handshake per request,
+# retrying rate limits and transient server errors with backoff
+session = requests.Session()
+adapter = HTTPAdapter(
+    pool_connections=8,
+    pool_maxsize=8,
+    max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504])
+)
+session.mount("https://", adapter)
 
-    print(f"\nProcessing page {current_result_page}...")
+def fetch_and_parse(page_num):
+    """Fetch one search result page through scrape.do and return its products"""
+    print(f"\nProcessing page {page_num}...")
     
-    targetUrl = urllib.parse.quote("https://www.amazon.in/s?k=laptops+under+50k&crid=32IAGWWR9UW7B&sprefix=laptops+u%2Caps%2C240&ref=nb_sb_ss_mvt-t11-ranker_1_9&page={}".format(current_result_page))
+    targetUrl = urllib.parse.quote("https://www.amazon.in/s?k=laptops+under+50k&crid=32IAGWWR9UW7B&sprefix=laptops+u%2Caps%2C240&ref=nb_sb_ss_mvt-t11-ranker_1_9&page={}".format(page_num))
     apiUrl = "https://api.scrape.do/?token={}&url={}".format(token, targetUrl)
     
+    page_products = []
+    
     try:
-        response = requests.request("GET", apiUrl)
-        print(f"Response status: {response.status_code}")
+        response = session.get(apiUrl, timeout=30)
+        print(f"Response status for page {page_num}: {response.status_code}")
         
         if response.status_code != 200:
-            print(f"Failed to fetch page {current_result_page}. Status: {response.status_code}")
-            current_result_page += 1
-            continue
+            print(f"Failed to fetch page {page_num}. Status: {response.status_code}")
+            return page_products
 
-        soup = BeautifulSoup(response.text, "html.parser")
+        soup = BeautifulSoup(response.text, "lxml")
 
         # Parse products on the current page
         product_elements = soup.find_all("div", {"class": "s-result-item"})
-        print(f"Found {len(product_elements)} product elements on page {current_result_page}")
+        print(f"Found {len(product_elements)} product elements on page {page_num}")
 
         products_found_on_page = 0
         
         for product in product_elements:
             try:
                 # Extract product name
-                name_element = product.select_one("h2 span")
-                if not name_element:
-                    name_element = product.select_one("h2 a span")
-                if not name_element:
-                    name_element = product.select_one(".a-size-medium")
+                name_element = _select_first(product, NAME_SELECTORS)
                 
                 if name_element:
                     name = name_element.text.strip()
@@ -63,20 +82,9 @@ while True:
                 # Extract price
                 price = "Price not available"
                 try:
-                    # Try multiple price selectors
-                    price_element = product.select_one("span.a-price-whole")
-                    if not price_element:
-                        price_element = product.select_one("span.a-price")
-                    if not price_element:
-                        price_element = product.select_one(".a-price .a-offscreen")
-                    
+                    price_element = _select_first(product, PRICE_SELECTORS)
                     if price_element:
                         price = price_element.text.strip()
-                    else:
-                        # Try to extract from price range
-                        price_text = str(product.select("span.a-price"))
-                        if 'a-offscreen">' in price_text:
-                            price = price_text.split('a-offscreen">')[1].split('</span>')[0]
                 except Exception as e:
                     print(f"Error extracting price: {e}")
                 
@@ -104,7 +112,7 @@ while True:
                 
                 # Only add products that have at least a name
                 if name and name != "":
-                    all_products.append({
+                    page_products.append({
                         "Name": name, 
                         "Price": price, 
                         "Link": link, 
@@ -116,34 +124,52 @@ while True:
                 print(f"Error processing product: {e}")
                 continue
         
-        print(f"Successfully extracted {products_found_on_page} products from page {current_result_page}")
+        print(f"Successfully extracted {products_found_on_page} products from page {page_num}")
         
     except Exception as e:
-        print(f"Error processing page {current_result_page}: {e}")
+        print(f"Error processing page {page_num}: {e}")
     
-    current_result_page += 1
-
-print(f"\nScraping completed!")
-print(f"Total products found: {len(all_products)}")
+    return page_products
 
 # Export the data to a CSV file
 csv_file = "amazon_search_results.csv"
 headers = ["Name", "Price", "Link", "Image"]
 
+total_products = 0
+preview_products = []
+
 try:
+    # Rows are written as each page arrives, so memory stays bounded and a partial scrape is kept on disk
     with open(csv_file, "w", newline="", encoding="utf-8") as file:
         writer = csv.DictWriter(file, fieldnames=headers)
         writer.writeheader()
-        writer.writerows(all_products)
-    
+
+        # Pages are independent, so fetch them concurrently; total time is roughly that of the slowest page
+        with ThreadPoolExecutor(max_workers=PAGE_WORKERS) as executor:
+            futures = {executor.submit(fetch_and_parse, page): page for page in range(1, max_result_page + 1)}
+
+            # Hold back pages that finish early so the CSV stays in page order
+            pending_pages = {}
+            next_page = 1
+            for future in as_completed(futures):
+                pending_pages[futures[future]] = future.result()
+                while next_page in pending_pages:
+                    page_products = pending_pages.pop(next_page)
+                    writer.writerows(page_products)
+                    file.flush()
+                    total_products += len(page_products)
+                    preview_products.extend(page_products[:3 - len(preview_products)])
+                    next_page += 1
+
+    print(f"\nScraping completed!")
     print(f"Data successfully exported to {csv_file}")
-    print(f"Total products saved: {len(all_products)}")
+    print(f"Total products saved: {total_products}")
     
 except Exception as e:
     print(f"Error saving to CSV: {e}")
 
 # Print first few products as preview
-if all_products:
+if preview_products:
     print("\nFirst 3 products preview:")
-    for i, product in enumerate(all_products[:3]):
+    for i, product in enumerate(preview_products):
         print(f"{i+1}. {product['Name'][:50]}... - {product['Price']}")
@@ -3,19 +3,36 @@ Google Custom Search API integration for Prompt2Insight
 """
 
 import os
+import threading
+import time
 import requests
+from requests.adapters import HTTPAdapter
+from collections import OrderedDict
 from typing import List, Dict, Optional
 from fastapi import HTTPException
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Identical searches within this many seconds reuse the earlier results instead of
+# spending another Custom Search request (and quota)
+SEARCH_CACHE_TTL = 300
+SEARCH_CACHE_SIZE = 256
+
 class GoogleSearchAPI:
     def __init__(self):
         self.api_key = os.getenv("GOOGLE_CSE_API_KEY")
         self.search_engine_id = os.getenv("GOOGLE_CSE_ENGINE_ID")
         self.base_url = "https://www.googleapis.com/customsearch/v1"
         
+        # Keep-alive connection pool shared by every search (calls run in worker threads)
+        self.session = requests.Session()
+        self.session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=20))
+        
+        # (normalized query, num_results) -> (timestamp, results), in LRU order
+        self._cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        
         if not self.api_key:
             logger.warning("GOOGLE_CSE_API_KEY not found in environment variables")
         if not self.search_engine_id:
@@ -38,6 +55,12 @@ class GoogleSearchAPI:
                 detail="Google Search API not configured. Missing API key or search engine ID."
             )
         
+        cache_key = (" ".join(query.lower().split()), num_results)
+        cached = self._cached_results(cache_key)
+        if cached is not None:
+            logger.debug(f"Search cache hit for: {query}")
+            return cached
+        
         try:
             # First try web search (more reliable)
             params = {
@@ -52,7 +75,7 @@ class GoogleSearchAPI:
             logger.info(f"Searching Google for: {query}")
             logger.debug(f"Search params: {params}")
             
-            response = requests.get(self.base_url, params=params, timeout=10)
+            response = self.session.get(self.base_url, params=params, timeout=10)
             logger.debug(f"Google API response status: {response.status_code}")
             
             if response.status_code != 200:
@@ -92,6 +115,7 @@ class GoogleSearchAPI:
                 results.append(result)
             
             logger.info(f"Found {len(results)} results for query: {query}")
+            self._cache_results(cache_key, results)
             return results
             
         except requests.RequestException as e:
@@ -101,6 +125,27 @@ class GoogleSearchAPI:
             logger.error(f"Unexpected error in Google Search: {e}")
             raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
     
+    def _cached_results(self, cache_key: tuple) -> Optional[List[Dict]]:
+        """Return a copy of unexpired cached results for a search, or None"""
+        with self._cache_lock:
+            entry = self._cache.get(cache_key)
+            if entry is None:
+                return None
+            if time.monotonic() - entry[0] >= SEARCH_CACHE_TTL:
+                del self._cache[cache_key]
+                return None
+            self._cache.move_to_end(cache_key)
+            # Callers may modify the result dicts, so hand out copies
+            return [dict(result) for result in entry[1]]
+    
+    def _cache_results(self, cache_key: tuple, results: List[Dict]):
+        """Cache a copy of search results, evicting the least recently used search when full"""
+        with self._cache_lock:
+            self._cache[cache_key] = (time.monotonic(), [dict(result) for result in results])
+            self._cache.move_to_end(cache_key)
+            if len(self._cache) > SEARCH_CACHE_SIZE:
+                self._cache.popitem(last=False)
+    
     def _clean_text(self, text: str) -> str:
         """Clean and format text content"""
         if not text:
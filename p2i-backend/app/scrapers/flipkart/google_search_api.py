@@ -4,6 +4,7 @@ Minimal Google Search API for Prompt2Insight Backend
 Only contains Google Search functionality - all Flipkart scraping removed
 """
 
+import asyncio
 import os
 import time
 from dotenv import load_dotenv
@@ -19,6 +20,7 @@ print(f"🔍 Google Engine ID loaded: {'✅' if google_engine_id else '❌'}")
 
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
 from typing import Dict, List, Optional
 from google_search import google_search
@@ -27,7 +29,8 @@ from datetime import datetime
 app = FastAPI(
     title="Google Search API",
     description="Google Custom Search API for product search",
-    version="2.0.0"
+    version="2.0.0",
+    default_response_class=ORJSONResponse
 )
 
 # Add CORS middleware
@@ -77,7 +80,10 @@ async def search_google_products(request: GoogleSearchRequest):
     Returns top product results with images and descriptions
     """
     try:
-        results = google_search.search_products(
+        # The search is a blocking HTTP call; run it in a worker thread so the
+        # event loop keeps serving other requests meanwhile
+        results = await asyncio.to_thread(
+            google_search.search_products,
             query=request.query, 
             num_results=request.num_results
         )
@@ -1,28 +1,74 @@
+import asyncio
 import urllib.parse
+import aiohttp
 import requests
+from requests.adapters import HTTPAdapter
 from bs4 import BeautifulSoup
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 import json
+import logging
 import re
 import os
+from dataclasses import asdict, dataclass, field
 from datetime import datetime
+from functools import lru_cache
 from dotenv import load_dotenv
+from yarl import URL
 
 # Load environment variables from .env file
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+# Fallback selectors per field, in priority order; the first selector that matches wins
+NAME_SELECTORS = ("h2 span", "h2 a span", ".a-size-medium")
+PRICE_SELECTORS = ("span.a-price-whole", "span.a-price", ".a-price .a-offscreen")
+
+def _select_first(element, selectors):
+    """
+    Return the match of the first selector that matches, trying them in order.
+    """
+    for selector in selectors:
+        match = element.select_one(selector)
+        if match is not None:
+            return match
+    return None
+
+# Price in a price filter (e.g. "under ₹80000") and star count in a rating label
+PRICE_FILTER_RE = re.compile(r'₹?(\d+)')
+RATING_RE = re.compile(r'(\d+(?:\.\d+)?)')
+
+@dataclass(slots=True)
+class ScrapeResult:
+    """Result of a single Amazon scrape, successful or not."""
+    success: bool
+    search_query: str
+    target_url: str
+    products_found: int = 0
+    max_products_requested: int = 0
+    products: List[Dict[str, Any]] = field(default_factory=list)
+    metadata: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+
 class AmazonScraper:
     """
     Amazon scraper that automatically generates target URLs from parsed prompt JSON
     and returns scraped data in JSON format.
     """
     
+    max_products = 5  # Maximum products to scrape from first page
+    
     def __init__(self):
         """Initialize the Amazon scraper with scrape.do token from environment variables."""
         self.token = os.getenv("SCRAPEDO_API_KEY")
         if not self.token:
             raise ValueError("SCRAPEDO_API_KEY not found in environment variables")
-        self.max_products = 5  # Maximum products to scrape from first page
+        # Reuse one HTTP session so scrape.do connections are kept alive between requests.
+        # The pool is sized for concurrent scrapes running in worker threads.
+        self.session = requests.Session()
+        self.session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=20))
+        # aiohttp session for scrape_products_async, created lazily inside the event loop
+        self._async_session: Optional[aiohttp.ClientSession] = None
         
     def _build_search_query(self, products: List[str], filters: Dict[str, Any], attributes: List[str]) -> str:
         """
@@ -47,7 +93,7 @@ class AmazonScraper:
             price_filter = filters["price"]
             if "under" in price_filter.lower():
                 # Extract price value and convert to number
-                price_match = re.search(r'₹?(\d+)', price_filter)
+                price_match = PRICE_FILTER_RE.search(price_filter)
                 if price_match:
                     price_value = price_match.group(1)
                     query_parts.append(f"under {price_value}")
@@ -102,11 +148,7 @@ class AmazonScraper:
         """
         try:
             # Extract product name
-            name_element = product_element.select_one("h2 span")
-            if not name_element:
-                name_element = product_element.select_one("h2 a span")
-            if not name_element:
-                name_element = product_element.select_one(".a-size-medium")
+            name_element = _select_first(product_element, NAME_SELECTORS)
             
             if not name_element:
                 return None
@@ -118,20 +160,9 @@ class AmazonScraper:
             # Extract price
             price = "Price not available"
             try:
-                # Try multiple price selectors
-                price_element = product_element.select_one("span.a-price-whole")
-                if not price_element:
-                    price_element = product_element.select_one("span.a-price")
-                if not price_element:
-                    price_element = product_element.select_one(".a-price .a-offscreen")
-                
+                price_element = _select_first(product_element, PRICE_SELECTORS)
                 if price_element:
                     price = price_element.text.strip()
-                else:
-                    # Try to extract from price range
-                    price_text = str(product_element.select("span.a-price"))
-                    if 'a-offscreen">' in price_text:
-                        price = price_text.split('a-offscreen">')[1].split('</span>')[0]
             except Exception:
                 pass
             
@@ -174,7 +205,7 @@ class AmazonScraper:
                     if "out of" in rating_text:
                         rating = rating_text.split(" out of")[0]
                     elif "stars" in rating_text:
-                        rating_match = re.search(r'(\d+(?:\.\d+)?)', rating_text)
+                        rating_match = RATING_RE.search(rating_text)
                         if rating_match:
                             rating = rating_match.group(1) + " stars"
                     else:
@@ -191,10 +222,92 @@ class AmazonScraper:
             }
             
         except Exception as e:
-            print(f"Error extracting product data: {e}")
+            logger.warning("Error extracting product data: %s", e)
             return None
     
-    def scrape_products(self, prompt_data: Dict[str, Any]) -> Dict[str, Any]:
+    def _prepare_request(self, prompt_data: Dict[str, Any]) -> Tuple[str, str, str, int]:
+        """
+        Build the search query, Amazon URL and scrape.do API URL from parsed prompt JSON.
+        
+        Args:
+            prompt_data: Parsed prompt data (see scrape_products)
+            
+        Returns:
+            Tuple of (search_query, amazon_url, api_url, max_products)
+        """
+        # Extract data from prompt
+        products = prompt_data.get("products", [])
+        filters = prompt_data.get("filters", {})
+        attributes = prompt_data.get("attributes", [])
+        max_products = prompt_data.get("max_products_per_query", 5)
+        
+        # Build search query
+        search_query = self._build_search_query(products, filters, attributes)
+        logger.debug("🔍 Built search query: %s", search_query)
+        
+        # Build Amazon URL
+        amazon_url = self._build_amazon_url(search_query)
+        logger.debug("🌐 Target URL: %s", amazon_url)
+        
+        # Scrape using scrape.do
+        target_url = urllib.parse.quote(amazon_url)
+        api_url = f"https://api.scrape.do/?token={self.token}&url={target_url}"
+        
+        return search_query, amazon_url, api_url, max_products
+    
+    def _parse_products(self, html: str, max_products: int) -> List[Dict[str, Any]]:
+        """
+        Parse an Amazon search results page and extract up to max_products products.
+        
+        Args:
+            html: Raw HTML of the search results page
+            max_products: Maximum number of products to extract
+            
+        Returns:
+            List of product dictionaries
+        """
+        # lxml is a C parser and much faster than html.parser on full result pages
+        soup = BeautifulSoup(html, "lxml")
+        
+        # Find product elements
+        product_elements = soup.find_all("div", {"class": "s-result-item"})
+        logger.debug("📦 Found %d product elements", len(product_elements))
+        
+        # Extract product data
+        scraped_products = []
+        products_found = 0
+        
+        for product_element in product_elements:
+            if products_found >= max_products:
+                break
+                
+            product_data = self._extract_product_data(product_element)
+            if product_data:
+                scraped_products.append(product_data)
+                products_found += 1
+                logger.debug("✅ Extracted product %d: %.50s...", products_found, product_data['name'])
+        
+        return scraped_products
+    
+    def _build_result(self, search_query: str, amazon_url: str, max_products: int,
+                      scraped_products: List[Dict[str, Any]]) -> ScrapeResult:
+        """Build the successful scrape response with a simple timestamp."""
+        logger.info("🎯 Scraping completed! Found %d products", len(scraped_products))
+        return ScrapeResult(
+            success=True,
+            search_query=search_query,
+            target_url=amazon_url,
+            products_found=len(scraped_products),
+            max_products_requested=max_products,
+            products=scraped_products,
+            metadata={
+                "scraper": "Amazon",
+                "source": "amazon.in",
+                "timestamp": datetime.now().isoformat()
+            }
+        )
+    
+    def scrape_products(self, prompt_data: Dict[str, Any]) -> ScrapeResult:
         """
         Main method to scrape Amazon products based on parsed prompt JSON.
         
@@ -212,84 +325,101 @@ class AmazonScraper:
                 }
                 
         Returns:
-            Dictionary containing scraped products and metadata
+            ScrapeResult containing scraped products and metadata
         """
+        search_query = amazon_url = "Unknown"
         try:
-            # Extract data from prompt
-            products = prompt_data.get("products", [])
-            filters = prompt_data.get("filters", {})
-            attributes = prompt_data.get("attributes", [])
-            max_products = prompt_data.get("max_products_per_query", 5)
-            
-            # Build search query
-            search_query = self._build_search_query(products, filters, attributes)
-            print(f"🔍 Built search query: {search_query}")
-            
-            # Build Amazon URL
-            amazon_url = self._build_amazon_url(search_query)
-            print(f"🌐 Target URL: {amazon_url}")
+            search_query, amazon_url, api_url, max_products = self._prepare_request(prompt_data)
             
-            # Scrape using scrape.do
-            target_url = urllib.parse.quote(amazon_url)
-            api_url = f"https://api.scrape.do/?token={self.token}&url={target_url}"
-            
-            print(f"📡 Fetching data from Amazon...")
-            response = requests.get(api_url, timeout=30)
+            logger.debug("📡 Fetching data from Amazon...")
+            response = self.session.get(api_url, timeout=30)
             
             if response.status_code != 200:
-                return {
-                    "success": False,
-                    "error": f"Failed to fetch data. Status: {response.status_code}",
-                    "search_query": search_query,
-                    "target_url": amazon_url
-                }
+                return ScrapeResult(
+                    success=False,
+                    search_query=search_query,
+                    target_url=amazon_url,
+                    error=f"Failed to fetch data. Status: {response.status_code}"
+                )
             
-            # Parse HTML
-            soup = BeautifulSoup(response.text, "html.parser")
+            scraped_products = self._parse_products(response.text, max_products)
+            return self._build_result(search_query, amazon_url, max_products, scraped_products)
             
-            # Find product elements
-            product_elements = soup.find_all("div", {"class": "s-result-item"})
-            print(f"📦 Found {len(product_elements)} product elements")
+        except Exception as e:
+            return ScrapeResult(
+                success=False,
+                search_query=search_query,
+                target_url=amazon_url,
+                error=f"Scraping failed: {str(e)}"
+            )
+    
+    def _get_async_session(self) -> aiohttp.ClientSession:
+        """Return the shared aiohttp session, creating it inside the running event loop."""
+        if self._async_session is None or self._async_session.closed:
+            self._async_session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=200),
+                timeout=aiohttp.ClientTimeout(total=30)
+            )
+        return self._async_session
+    
+    async def scrape_products_async(self, prompt_data: Dict[str, Any]) -> ScrapeResult:
+        """
+        Coroutine-native version of scrape_products.
+        
+        The scrape.do request runs on the event loop through a shared aiohttp
+        session, so in-flight scrapes don't each hold a worker thread. Only the
+        CPU-bound HTML parsing is handed to a thread.
+        
+        Args:
+            prompt_data: Parsed prompt data (see scrape_products)
             
-            # Extract product data
-            scraped_products = []
-            products_found = 0
+        Returns:
+            ScrapeResult containing scraped products and metadata
+        """
+        search_query = amazon_url = "Unknown"
+        try:
+            search_query, amazon_url, api_url, max_products = self._prepare_request(prompt_data)
             
-            for product_element in product_elements:
-                if products_found >= max_products:
-                    break
-                    
-                product_data = self._extract_product_data(product_element)
-                if product_data:
-                    scraped_products.append(product_data)
-                    products_found += 1
-                    print(f"✅ Extracted product {products_found}: {product_data['name'][:50]}...")
+            logger.debug("📡 Fetching data from Amazon...")
+            # The URL is already percent-encoded; stop aiohttp from re-quoting it
+            async with self._get_async_session().get(URL(api_url, encoded=True)) as response:
+                status = response.status
+                html = await response.text()
             
-            # Prepare response with simple timestamp
-            result = {
-                "success": True,
-                "search_query": search_query,
-                "target_url": amazon_url,
-                "products_found": len(scraped_products),
-                "max_products_requested": max_products,
-                "products": scraped_products,
-                "metadata": {
-                    "scraper": "Amazon",
-                    "source": "amazon.in",
-                    "timestamp": datetime.now().isoformat()
-                }
-            }
+            if status != 200:
+                return ScrapeResult(
+                    success=False,
+                    search_query=search_query,
+                    target_url=amazon_url,
+                    error=f"Failed to fetch data. Status: {status}"
+                )
             
-            print(f"🎯 Scraping completed! Found {len(scraped_products)} products")
-            return result
+            scraped_products = await asyncio.to_thread(self._parse_products, html, max_products)
+            return self._build_result(search_query, amazon_url, max_products, scraped_products)
             
         except Exception as e:
-            return {
-                "success": False,
-                "error": f"Scraping failed: {str(e)}",
-                "search_query": search_query if 'search_query' in locals() else "Unknown",
-                "target_url": amazon_url if 'amazon_url' in locals() else "Unknown"
-            }
+            return ScrapeResult(
+                success=False,
+                search_query=search_query,
+                target_url=amazon_url,
+                error=f"Scraping failed: {str(e)}"
+            )
+    
+    async def aclose(self):
+        """Close the shared aiohttp session, if one was opened."""
+        if self._async_session is not None and not self._async_session.closed:
+            await self._async_session.close()
+
+@lru_cache(maxsize=1)
+def get_amazon_scraper() -> AmazonScraper:
+    """
+    Return the shared AmazonScraper instance, creating it on first use.
+    
+    Raises:
+        ValueError: If SCRAPEDO_API_KEY is not configured (not cached, so a
+            later call retries once the key is set)
+    """
+    return AmazonScraper()
 
 # Example usage and testing
 if __name__ == "__main__":
@@ -308,4 +438,4 @@ if __name__ == "__main__":
     }
     
     result = scraper.scrape_products(test_prompt)
-    print(json.dumps(result, indent=2, ensure_ascii=False)) 
\ No newline at end of file
+    print(json.dumps(asdict(result), indent=2, ensure_ascii=False)) 
\ No newline at end of file
@@ -1,12 +1,15 @@
 import requests
+from requests.adapters import HTTPAdapter
 from bs4 import BeautifulSoup
 from gnews import GNews
 from youtube_transcript_api import YouTubeTranscriptApi
 import trafilatura
 import feedparser
+from functools import lru_cache
 from typing import List
 import os
 import random
+import time
 
 class DataScraper:
     """
@@ -23,6 +26,12 @@ class DataScraper:
             'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.1 Safari/605.1.15',
             'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:109.0) Gecko/20100101 Firefox/119.0'
         ]
+        
+        # Keep-alive connection pools reused across requests; articles come from many
+        # hosts, so keep a pool for each of the most recent ones
+        self.session = requests.Session()
+        self.session.mount("https://", HTTPAdapter(pool_connections=16, pool_maxsize=16))
+        self.session.mount("http://", HTTPAdapter(pool_connections=16, pool_maxsize=16))
 
     def get_random_user_agent(self):
         """Get a random user agent from the static list."""
@@ -45,7 +54,7 @@ class DataScraper:
             headers = {'User-Agent': user_agent}
             
             # Use requests to get the content with headers and timeout
-            response = requests.get(url, headers=headers, timeout=15)
+            response = self.session.get(url, headers=headers, timeout=15)
             response.raise_for_status()
             
             # If download successful, use trafilatura to extract main article content
@@ -99,7 +108,7 @@ class DataScraper:
             print(f"🔍 Searching Serper.dev for: {payload['q']}")
             
             # Make POST request to search_url
-            response = requests.post(search_url, json=payload, headers=headers, timeout=10)
+            response = self.session.post(search_url, json=payload, headers=headers, timeout=10)
             response.raise_for_status()
             
             # Parse JSON response and extract URLs from organic search results
@@ -398,7 +407,7 @@ class DataScraper:
             
             try:
                 # Use requests instead of GNews to avoid event loop issues
-                response = requests.get(search_url, timeout=10)
+                response = self.session.get(search_url, timeout=10)
                 if response.status_code == 200:
                     # Parse the RSS feed
                     feed = feedparser.parse(response.text)
@@ -466,8 +475,6 @@ class DataScraper:
                 
                 # Legacy method fallback using GNews only if the RSS method failed
                 try:
-                    # Only import GNews here if needed to avoid event loop issues
-                    from gnews import GNews
                     print("⚠️ Falling back to GNews library (potential event loop issues)")
                     
                     google_news = GNews()
@@ -523,7 +530,7 @@ class DataScraper:
             search_query = f"{product_name} review"
             search_url = f"https://www.youtube.com/results?search_query={search_query.replace(' ', '+')}"
             
-            response = requests.get(search_url)
+            response = self.session.get(search_url)
             response.raise_for_status()
             
             soup = BeautifulSoup(response.text, 'html.parser')
@@ -567,10 +574,6 @@ class DataScraper:
             A list of strings containing extracted content from search results.
         """
         try:
-            import requests
-            from bs4 import BeautifulSoup
-            import trafilatura
-            
             # Get API credentials
             api_key = os.getenv("GOOGLE_CSE_API_KEY")
             search_engine_id = os.getenv("GOOGLE_CSE_ENGINE_ID")
@@ -602,7 +605,7 @@ class DataScraper:
                         "lr": "lang_en"
                     }
                     
-                    response = requests.get(
+                    response = self.session.get(
                         "https://www.googleapis.com/customsearch/v1", 
                         params=params, 
                         timeout=10
@@ -659,7 +662,6 @@ class DataScraper:
                             continue
                     
                     # Don't hammer the API - small delay between queries
-                    import time
                     time.sleep(1)
                     
                 except Exception as e:
@@ -673,6 +675,13 @@ class DataScraper:
             print(f"❌ Google Search API fallback failed: {e}")
             return []
 
+@lru_cache(maxsize=1)
+def get_data_scraper() -> DataScraper:
+    """
+    Returns the process-wide DataScraper, creating it on first use.
+    """
+    return DataScraper()
+
 if __name__ == '__main__':
     # Example Usage
     scraper = DataScraper()
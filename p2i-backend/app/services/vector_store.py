@@ -1,11 +1,19 @@
 import os
+import uuid
 import chromadb
 from pathlib import Path
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
 from langchain_chroma import Chroma
 from dotenv import load_dotenv
+from functools import lru_cache
 from typing import List
 
+# Load environment variables once at import, not per service instance
+load_dotenv()
+
+# Documents embedded per request and added to ChromaDB per call when building a collection
+EMBEDDING_BATCH_SIZE = 128
+
 class VectorStoreService:
     """
     A service class for managing a ChromaDB vector store with LangChain.
@@ -13,10 +21,8 @@ class VectorStoreService:
 
     def __init__(self):
         """
-        Initializes the service, loading environment variables and setting up
-        the embedding model and ChromaDB client.
+        Initializes the service, setting up the embedding model and ChromaDB client.
         """
-        load_dotenv()
         api_key = os.getenv("GOOGLE_API_KEY")
         if not api_key:
             raise ValueError("GOOGLE_API_KEY not found in environment variables.")
@@ -52,15 +58,23 @@ class VectorStoreService:
         Returns:
             A LangChain Chroma vector store object.
         """
-        vector_store = Chroma.from_texts(
-            texts=documents,
-            embedding=self.embedding_function,
+        collection = self.client.get_or_create_collection(name=collection_name)
+        
+        # One embedding request and one ChromaDB write per batch of documents
+        for start in range(0, len(documents), EMBEDDING_BATCH_SIZE):
+            batch = documents[start:start + EMBEDDING_BATCH_SIZE]
+            collection.add(
+                ids=[str(uuid.uuid4()) for _ in batch],
+                embeddings=self.embedding_function.embed_documents(batch),
+                documents=batch
+            )
+        
+        # Persistence is handled automatically by the PersistentClient
+        return Chroma(
+            client=self.client,
             collection_name=collection_name,
-            persist_directory=self.persist_directory
+            embedding_function=self.embedding_function
         )
-        # Note: persist() is no longer needed in newer versions of langchain-chroma
-        # Persistence is handled automatically
-        return vector_store
 
     def get_retriever(self, collection_name: str):
         """
@@ -73,12 +87,22 @@ class VectorStoreService:
             A LangChain retriever object configured to return the top 3 documents.
         """
         vector_store = Chroma(
-            persist_directory=self.persist_directory,
+            client=self.client,
             embedding_function=self.embedding_function,
             collection_name=collection_name
         )
         return vector_store.as_retriever(search_kwargs={"k": 3})
 
+@lru_cache(maxsize=1)
+def get_vector_service() -> VectorStoreService:
+    """
+    Returns the process-wide VectorStoreService, creating it on first use.
+
+    Sharing one instance keeps a single ChromaDB client and embedding model
+    in memory instead of rebuilding them on every request.
+    """
+    return VectorStoreService()
+
 if __name__ == '__main__':
     # This block demonstrates how to use the VectorStoreService.
     # Note: You must have a .env file with your GOOGLE_API_KEY.
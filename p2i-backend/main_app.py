@@ -5,6 +5,7 @@ Amazon product scraping functionality
 """
 
 from dotenv import load_dotenv
+import logging
 import os
 import sys
 from pathlib import Path
@@ -12,6 +13,12 @@ from pathlib import Path
 # Load environment variables from .env file
 load_dotenv()
 
+# Configure app logging; production runs at INFO so per-request debug output is skipped
+logging.basicConfig(
+    level=os.getenv("LOG_LEVEL", "INFO").upper(),
+    format="%(asctime)s %(levelname)s %(name)s: %(message)s"
+)
+
 # Debug: Check if environment variables are loaded
 google_api_key = os.getenv("GOOGLE_CSE_API_KEY")
 google_engine_id = os.getenv("GOOGLE_CSE_ENGINE_ID")
@@ -20,6 +27,7 @@ print(f"🔍 Google Engine ID loaded: {'✅' if google_engine_id else '❌'}")
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 
 # Import the new API router (includes RAG and Amazon scraper)
 from app.api.v1.router import api_router
@@ -28,7 +36,8 @@ from app.api.v1.router import api_router
 app = FastAPI(
     title="Prompt2Insight Backend API",
     description="Amazon product scraping API",
-    version="2.0.0"
+    version="2.0.0",
+    default_response_class=ORJSONResponse
 )
 
 # Add CORS middleware
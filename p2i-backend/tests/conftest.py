@@ -0,0 +1,31 @@
+"""
+Shared fixtures for the backend tests
+"""
+
+import sys
+import types
+
+import numpy as np
+import pytest
+
+# The caches under test only need google.generativeai for network calls the tests
+# replace, so a stub keeps the suite runnable without the Gemini SDK installed
+try:
+    import google.generativeai  # noqa: F401
+except ImportError:
+    def _embed_content(**kwargs):
+        raise RuntimeError("google.generativeai is stubbed in tests")
+
+    genai_stub = types.ModuleType("google.generativeai")
+    genai_stub.configure = lambda **kwargs: None
+    genai_stub.GenerativeModel = lambda *args, **kwargs: None
+    genai_stub.embed_content = _embed_content
+    sys.modules.setdefault("google", types.ModuleType("google"))
+    sys.modules["google"].generativeai = genai_stub
+    sys.modules["google.generativeai"] = genai_stub
+
+
+@pytest.fixture
+def same_embedding():
+    """One unit vector for every query, so only the signature check tells queries apart"""
+    return np.ones(4, dtype=np.float32) / 2
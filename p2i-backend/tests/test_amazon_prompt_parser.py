@@ -0,0 +1,66 @@
+"""
+Tests for the AmazonPromptParser regex fast path and semantic parse cache
+"""
+
+import pytest
+
+from app.core import amazon_prompt_parser
+
+
+@pytest.fixture
+def parser(monkeypatch, same_embedding):
+    """A parser with no Gemini key and no disk cache that embeds every query to the same vector"""
+    monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+    monkeypatch.setattr(amazon_prompt_parser, "PARSE_CACHE_PATH", "")
+    parser = amazon_prompt_parser.AmazonPromptParser()
+    monkeypatch.setattr(parser, "_embed_query", lambda normalized_query: same_embedding)
+    return parser
+
+
+@pytest.mark.parametrize("query", [
+    "laptops under 50k",
+    "gaming laptops under 50,000",
+    "iphone under 60000",
+])
+def test_fast_path_defers_ambiguous_queries_to_llm(parser, query):
+    assert parser._fast_parse(query) is None
+
+
+def test_fast_path_reads_plain_amount(parser):
+    result = parser._fast_parse("gaming laptops under 60000")
+
+    assert result["products"] == ["laptops"]
+    assert result["filters"] == {"price": "under ₹60000", "brand": "any"}
+    assert result["attributes"] == ["gaming"]
+
+
+def test_fast_path_keeps_known_brand(parser):
+    result = parser._fast_parse("dell laptop under 60000")
+
+    assert result["filters"] == {"price": "under ₹60000", "brand": "dell"}
+
+
+def _cache(parser, query, embedding):
+    result = {"intent": "search", "products": ["laptops"], "filters": {"price": "any", "brand": "any"},
+              "attributes": [], "max_products_per_query": 5}
+    parser._cache_parse(parser._normalize_query(query), embedding, result, persist=False)
+
+
+@pytest.mark.parametrize("cached_query, query", [
+    ("best laptop for coding under 40000", "best laptop for coding under 80000"),
+    ("dell laptop for video editing", "hp laptop for video editing"),
+])
+def test_semantic_cache_rejects_different_amount_or_brand(parser, same_embedding, cached_query, query):
+    _cache(parser, cached_query, same_embedding)
+
+    cached, _, _ = parser._lookup_cached(query)
+
+    assert cached is None
+
+
+def test_semantic_cache_matches_equivalent_amount(parser, same_embedding):
+    _cache(parser, "best laptop for coding under 40000", same_embedding)
+
+    cached, _, _ = parser._lookup_cached("best laptop for coding under 40k")
+
+    assert cached["products"] == ["laptops"]
@@ -0,0 +1,65 @@
+"""
+Tests for the two-tier LLM response cache
+"""
+
+import pytest
+
+from app.core import llm_cache
+from app.core.llm_cache import LLMCache, query_signature
+
+
+@pytest.fixture
+def cache(monkeypatch, same_embedding):
+    """A cache that embeds every query to the same vector"""
+    cache = LLMCache("Test", "1")
+    monkeypatch.setattr(cache, "_embed", lambda normalized_query: same_embedding)
+    return cache
+
+
+def _store(cache, query, value):
+    _, key, embedding = cache.lookup(query)
+    cache.store(key, embedding, value, query=query)
+
+
+def test_query_signature_expands_amounts():
+    assert query_signature("laptop under 40k") == query_signature("laptop under 40,000")
+    assert query_signature("phone under 1.5 lakh") == "150000|"
+    assert query_signature("dell laptop") == "|dell"
+
+
+@pytest.mark.parametrize("cached_query, query", [
+    ("laptop under 40000", "laptop under 80000"),
+    ("best dell laptop", "best hp laptop"),
+])
+def test_semantic_lookup_rejects_different_amount_or_brand(cache, cached_query, query):
+    _store(cache, cached_query, ["cached"])
+
+    value, _, _ = cache.lookup(query)
+
+    assert value is None
+
+
+def test_semantic_lookup_matches_equivalent_amount(cache):
+    _store(cache, "laptop under 40000", ["cached"])
+
+    value, _, _ = cache.lookup("laptop under 40k")
+
+    assert value == ["cached"]
+
+
+def test_entry_stored_without_query_only_matches_exactly(cache):
+    _, key, embedding = cache.lookup("laptop under 40000")
+    cache.store(key, embedding, ["cached"])
+
+    assert cache.lookup("laptop under 40k")[0] is None
+    assert cache.lookup("Laptop  under 40000")[0] == ["cached"]
+
+
+def test_expired_entry_is_not_returned(cache, monkeypatch):
+    cache.ttl = 60
+    _store(cache, "laptop under 40000", ["cached"])
+    now = llm_cache.time.monotonic()
+    monkeypatch.setattr(llm_cache.time, "monotonic", lambda: now + 61)
+
+    assert cache.lookup("laptop under 40000")[0] is None
+    assert cache.lookup("laptop under 40k")[0] is None